@@ -0,0 +1,55 @@
+import os
+
+import streamlit as st
+
+from tracing import cache_hit_rates, count_summary, label_shares, read_records, stage_percentiles
+
+# Run alongside the main app: streamlit run admin_app.py
+LOG_PATH = os.getenv("TRACE_LOG_PATH", os.path.join(".cache", "requests.jsonl"))
+
+st.set_page_config(page_title="jobsGPT latency", layout="wide")
+st.title("⏱️ Per-stage latency")
+
+limit = st.number_input("Most recent interactions to include", min_value=10, value=1000, step=100)
+kinds = st.multiselect("Interaction kinds", ["analysis", "chat", "rerun"], default=["analysis", "chat", "rerun"])
+
+records = [r for r in read_records(LOG_PATH, int(limit)) if r.get("kind") in kinds]
+if not records:
+    st.info(f"No interactions logged in {LOG_PATH} yet.")
+    st.stop()
+
+st.caption(f"{len(records)} interactions from {LOG_PATH}")
+
+summary = stage_percentiles(records)
+st.subheader("Milliseconds per stage")
+st.dataframe(
+    [{"stage": name, **{k: round(v, 1) if k != "count" else v for k, v in stats.items()}}
+     for name, stats in sorted(summary.items(), key=lambda item: -item[1]["p95"])],
+    hide_index=True,
+)
+
+st.subheader("Cache hit rates")
+st.dataframe(
+    [{"cache": name, "hits": hits, "misses": misses, "hit rate": f"{hits / (hits + misses):.0%}"}
+     for name, (hits, misses) in sorted(cache_hit_rates(records).items())],
+    hide_index=True,
+)
+
+st.subheader("Chat routes")
+# local: quoted from the posting; fast: the cheaper model tier; full: the main model with full context
+st.dataframe(
+    [{"route": name, "questions": count, "share": f"{share:.0%}"}
+     for name, (count, share) in label_shares(records, "route").items()],
+    hide_index=True,
+)
+
+st.subheader("Memory")
+# session_kb: what one session keeps alive; peak_rss_mb: the whole process
+memory = {name: count_summary(records, name) for name in ("cv_bytes", "session_kb", "peak_rss_mb")}
+st.dataframe(
+    [{"measure": name, **stats} for name, stats in memory.items() if stats],
+    hide_index=True,
+)
+
+with st.expander("Latest interactions"):
+    st.json(records[-20:])
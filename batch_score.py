@@ -0,0 +1,273 @@
+"""Score many CVs against many job postings without the Streamlit UI.
+
+    python batch_score.py cvs/ --jobs jobs.txt --out results.jsonl --csv results.csv
+
+Every CV found under the given paths is analyzed against every job URL with
+the same prompt the app's Analyze button uses. Answers come back as
+structured JSON (fit_result.FIT_SCHEMA), so the score and probability are
+stored in their own columns. Progress is kept in SQLite so an interrupted
+run picks up where it stopped.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+
+from cv_extract import EXTRACTORS, extract_cv_text
+from fit_result import fit_config, parse_fit, to_json
+from job_clean import extract_main_text
+from job_fetch import JobPageFetcher
+from prerank import select_pairs, similarity_matrix
+from prompts import PROMPT_VERSION, build_analysis_prompt
+from response_cache import ResponseCache, response_key
+from retries import call_with_retries
+from scheduler import GeminiScheduler
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+DEFAULT_PROGRESS_PATH = os.path.join(".cache", "batch_progress.sqlite3")
+
+
+def find_cvs(paths):
+    """CV files under the given files/directories, in a stable order"""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                found.extend(os.path.join(root, name) for name in files)
+        else:
+            found.append(path)
+    return sorted(p for p in found if p.lower().endswith(tuple(EXTRACTORS)))
+
+
+def read_job_urls(path):
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+class ProgressStore:
+    """Finished (CV, job) pairs, so a rerun only does the missing ones"""
+
+    def __init__(self, path=DEFAULT_PROGRESS_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS results (
+                    cv_sha TEXT NOT NULL,
+                    job_url TEXT NOT NULL,
+                    cv_path TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    prompt_version TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    score INTEGER,
+                    probability TEXT,
+                    analysis TEXT,
+                    error TEXT,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (cv_sha, job_url, model, prompt_version)
+                )"""
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(results)")}
+            if "probability" not in columns:
+                # Progress files from before structured output
+                self._conn.execute("ALTER TABLE results ADD COLUMN probability TEXT")
+
+    def done(self, model):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT cv_sha, job_url FROM results WHERE status = 'ok' AND model = ? AND prompt_version = ?",
+                (model, PROMPT_VERSION),
+            ).fetchall()
+        return set(rows)
+
+    def record(self, row):
+        with self._lock, self._conn:
+            self._conn.execute(
+                """INSERT OR REPLACE INTO results
+                (cv_sha, job_url, cv_path, model, prompt_version, status, score, probability, analysis, error, updated_at)
+                VALUES (:cv_sha, :job_url, :cv_path, :model, :prompt_version, :status, :score, :probability,
+                        :analysis, :error, :updated_at)""",
+                row,
+            )
+
+    def rows(self, model):
+        with self._lock:
+            cursor = self._conn.execute(
+                """SELECT cv_sha, job_url, cv_path, model, prompt_version, status, score, probability, analysis,
+                error, updated_at FROM results WHERE model = ? AND prompt_version = ? ORDER BY job_url, score DESC""",
+                (model, PROMPT_VERSION),
+            )
+            names = [c[0] for c in cursor.description]
+            return [dict(zip(names, values)) for values in cursor.fetchall()]
+
+
+def load_cvs(cv_paths):
+    """{path: (sha256, text)} for every readable CV"""
+    cvs = {}
+    for path in cv_paths:
+        with open(path, "rb") as f:
+            data = f.read()
+        try:
+            cvs[path] = (hashlib.sha256(data).hexdigest(), extract_cv_text(path, data))
+        except Exception as e:
+            print(f"skipping {path}: {e}", file=sys.stderr)
+    return cvs
+
+
+def load_jobs(job_urls, fetcher, workers=8):
+    """{url: cleaned job text}, fetched concurrently"""
+    def load(url):
+        return extract_main_text(fetcher.fetch(url).text).text
+
+    jobs = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(load, url): url for url in job_urls}
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                jobs[url] = future.result()
+            except Exception as e:
+                print(f"skipping {url}: {e}", file=sys.stderr)
+    return jobs
+
+
+def prerank_pairs(cvs, jobs, threshold=None, top_k=None):
+    """(cv_path, job_url) pairs that pass the local similarity gate"""
+    cv_paths, job_urls = list(cvs), list(jobs)
+    scores = similarity_matrix([cvs[p][1] for p in cv_paths], [jobs[u] for u in job_urls])
+    return [(cv_paths[i], job_urls[j]) for i, j in select_pairs(scores, threshold, top_k)]
+
+
+def score_batch(cvs, jobs, client, model=DEFAULT_MODEL, progress=None, response_cache=None,
+                concurrency=4, pairs=None, on_result=None, scheduler=None):
+    """Analyze each (CV, job) pair not already in progress; returns the new rows.
+
+    cvs is {path: (sha256, text)} and jobs is {url: text}. pairs limits the
+    run to specific (cv_path, job_url) tuples, e.g. after pre-ranking. A
+    scheduler, if given, paces the calls to a requests-per-minute quota.
+    """
+    done = progress.done(model) if progress else set()
+    if pairs is None:
+        pairs = [(path, url) for path in cvs for url in jobs]
+    todo = [(path, url) for path, url in pairs if (cvs[path][0], url) not in done]
+
+    def analyze(path, url):
+        cv_sha, cv_text = cvs[path]
+        key = response_key(cv_text, jobs[url], model, PROMPT_VERSION)
+        row = {"cv_sha": cv_sha, "job_url": url, "cv_path": path, "model": model,
+               "prompt_version": PROMPT_VERSION, "score": None, "probability": None, "analysis": None,
+               "error": None}
+        try:
+            analysis = response_cache.get(key) if response_cache else None
+            if analysis is None:
+                prompt = build_analysis_prompt(cv_text, jobs[url])
+                def generate():
+                    return client.models.generate_content(model=model, contents=prompt.text, config=fit_config())
+
+                if scheduler:
+                    response = scheduler.call("batch", generate)
+                else:
+                    response = call_with_retries(generate)
+                analysis = to_json(parse_fit(response.text or ""))
+                if response_cache:
+                    response_cache.put(key, analysis)
+            # The compact FitResult JSON, the same text the app caches
+            result = parse_fit(analysis)
+            row.update(status="ok", analysis=analysis, score=result.score, probability=result.probability)
+        except Exception as e:
+            row.update(status="error", error=str(e))
+        row["updated_at"] = time.time()
+        if progress:
+            progress.record(row)
+        return row
+
+    results = []
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(analyze, path, url) for path, url in todo]
+        for future in as_completed(futures):
+            row = future.result()
+            results.append(row)
+            if on_result:
+                on_result(row, len(results), len(todo))
+    return results
+
+
+def write_outputs(rows, jsonl_path=None, csv_path=None):
+    if jsonl_path:
+        with open(jsonl_path, "w", encoding="utf-8") as f:
+            for row in rows:
+                if row.get("analysis"):
+                    # Nested rather than a JSON string, so tools like jq can filter on it
+                    row = dict(row, analysis=json.loads(row["analysis"]))
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    if csv_path:
+        fields = ["cv_path", "job_url", "score", "probability", "status", "error"]
+        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+def make_client():
+    from google import genai
+
+    api_key = os.getenv("GEMINI_API_KEY") or os.getenv("JOB_GEMINI_KEY")
+    if not api_key:
+        raise SystemExit("Set GEMINI_API_KEY (or JOB_GEMINI_KEY) to call Gemini.")
+    return genai.Client(api_key=api_key)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score CVs against job postings with Gemini.")
+    parser.add_argument("cvs", nargs="+", help="CV files or directories of CVs (pdf, xml, docx)")
+    parser.add_argument("--jobs", required=True, help="text file with one job URL per line")
+    parser.add_argument("--out", default="results.jsonl", help="JSONL output path")
+    parser.add_argument("--csv", help="optional CSV output path")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--concurrency", type=int, default=4, help="Gemini calls in flight at once")
+    parser.add_argument("--progress", default=DEFAULT_PROGRESS_PATH, help="SQLite file used to resume runs")
+    parser.add_argument("--rpm", type=int, help="cap Gemini requests per minute")
+    parser.add_argument("--top-k", type=int, help="only analyze the k most similar CVs per job")
+    parser.add_argument("--min-similarity", type=float, help="skip pairs below this local TF-IDF cosine similarity")
+    args = parser.parse_args(argv)
+    # Checked before loading anything: a bad --top-k would only fail after every fetch
+    if args.top_k is not None and args.top_k < 1:
+        parser.error("--top-k must be at least 1")
+
+    load_dotenv()
+    cvs = load_cvs(find_cvs(args.cvs))
+    jobs = load_jobs(read_job_urls(args.jobs), JobPageFetcher())
+    print(f"{len(cvs)} CVs x {len(jobs)} jobs", file=sys.stderr)
+
+    pairs = None
+    if args.top_k is not None or args.min_similarity is not None:
+        pairs = prerank_pairs(cvs, jobs, args.min_similarity, args.top_k)
+        print(f"{len(pairs)} pairs pass the similarity gate", file=sys.stderr)
+
+    progress = ProgressStore(args.progress)
+
+    def report(row, finished, total):
+        score = row["score"] if row["status"] == "ok" else row["error"]
+        print(f"[{finished}/{total}] {row['cv_path']} x {row['job_url']}: {score}", file=sys.stderr)
+
+    score_batch(cvs, jobs, make_client(), args.model, progress, ResponseCache(),
+                args.concurrency, pairs, on_result=report,
+                scheduler=GeminiScheduler(args.rpm, max_in_flight=args.concurrency) if args.rpm else None)
+    current = {sha for sha, _ in cvs.values()}
+    rows = [row for row in progress.rows(args.model) if row["cv_sha"] in current and row["job_url"] in jobs]
+    write_outputs(rows, args.out, args.csv)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""Deterministic CV fixtures in every format the app accepts.
+
+PDFs are written by hand (one Helvetica text stream per page) so the corpus
+needs nothing beyond what the app already installs.
+"""
+import io
+import os
+import random
+import xml.sax.saxutils
+
+JOBS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "jobs")
+
+# size name -> number of roles. At LINES_PER_PAGE, large is 4 PDF pages and
+# portfolio over 30, well past cv_extract.PARALLEL_MIN_PAGES
+SIZES = {"small": 2, "medium": 8, "large": 30, "portfolio": 280}
+LINES_PER_PAGE = 50
+
+_EMPLOYERS = ["Northwind Traders", "Contoso Ltd", "Fabrikam", "Tailspin Toys", "Wide World Importers",
+              "Adventure Works", "Litware", "Proseware", "Woodgrove Bank", "Fourth Coffee"]
+_TITLES = ["Software Engineer", "Senior Software Engineer", "Data Engineer", "Backend Developer",
+           "Platform Engineer", "Staff Engineer", "Engineering Manager", "Analytics Engineer"]
+_SKILLS = ["Python", "SQL", "PostgreSQL", "AWS", "Docker", "Kubernetes", "Terraform", "Airflow",
+           "pandas", "Spark", "Go", "React", "TypeScript", "Kafka", "Redis", "BigQuery", "Linux", "CI/CD"]
+_VERBS = ["Built", "Designed", "Led", "Migrated", "Automated", "Reduced", "Scaled", "Introduced", "Owned"]
+_OBJECTS = ["the nightly ETL pipeline", "a billing service", "the on-call rotation", "an internal API gateway",
+            "the data warehouse", "a customer analytics dashboard", "the deployment tooling",
+            "a recommendation model in production", "the search backend"]
+_RESULTS = ["cutting run time by 40%", "serving 2M requests a day", "saving $120k a year",
+            "with zero downtime", "for a team of 12 engineers", "improving p95 latency from 900 ms to 180 ms"]
+
+
+def cv_sections(size, seed=0):
+    """{"name", "contact", "summary", "experience": [(heading, [bullets])], "education", "skills"}"""
+    rng = random.Random(f"{size}-{seed}")
+    roles = []
+    year = 2026
+    for _ in range(SIZES[size]):
+        start = year - rng.randint(1, 3)
+        heading = f"{rng.choice(_TITLES)}, {rng.choice(_EMPLOYERS)} ({start} - {year})"
+        bullets = [
+            f"{rng.choice(_VERBS)} {rng.choice(_OBJECTS)} in {rng.choice(_SKILLS)}, {rng.choice(_RESULTS)}."
+            for _ in range(rng.randint(3, 5))
+        ]
+        roles.append((heading, bullets))
+        year = start
+    return {
+        "name": "Jordan Avery",
+        "contact": "jordan.avery@example.com | +44 20 7946 0000 | London, UK",
+        "summary": "Engineer with a focus on data platforms and reliable backend services.",
+        "experience": roles,
+        "education": ["BSc Computer Science, University of Leeds (2012)"],
+        "skills": sorted(rng.sample(_SKILLS, 10)),
+    }
+
+
+def _lines(cv):
+    lines = [cv["name"], cv["contact"], "", "Summary", cv["summary"], "", "Experience"]
+    for heading, bullets in cv["experience"]:
+        lines.append(heading)
+        lines.extend(f"- {b}" for b in bullets)
+        lines.append("")
+    lines += ["Education", *cv["education"], "", "Skills", ", ".join(cv["skills"])]
+    return lines
+
+
+def _pdf_escape(line):
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(cv):
+    lines = _lines(cv)
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)]
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in pages:
+        stream = "BT /F1 10 Tf 50 800 Td 15 TL " + " ".join(f"({_pdf_escape(line)}) '" for line in page) + " ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>"
+        )
+        kids.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{k} 0 R' for k in kids)}] /Count {len(kids)} >>"
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    out.write("".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+def make_docx(cv):
+    import docx
+
+    document = docx.Document()
+    document.add_heading(cv["name"], level=0)
+    document.add_paragraph(cv["contact"])
+    document.add_heading("Summary", level=1)
+    document.add_paragraph(cv["summary"])
+    document.add_heading("Experience", level=1)
+    for heading, bullets in cv["experience"]:
+        document.add_heading(heading, level=2)
+        for bullet in bullets:
+            document.add_paragraph(bullet, style="List Bullet")
+    document.add_heading("Education", level=1)
+    for line in cv["education"]:
+        document.add_paragraph(line)
+    document.add_heading("Skills", level=1)
+    document.add_paragraph(", ".join(cv["skills"]))
+    out = io.BytesIO()
+    document.save(out)
+    return out.getvalue()
+
+
+def make_xml(cv):
+    esc = xml.sax.saxutils.escape
+    roles = "".join(
+        f"<role><title>{esc(heading)}</title>" + "".join(f"<achievement>{esc(b)}</achievement>" for b in bullets) + "</role>"
+        for heading, bullets in cv["experience"]
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f"<cv><name>{esc(cv['name'])}</name><contact>{esc(cv['contact'])}</contact>"
+        f"<summary>{esc(cv['summary'])}</summary><experience>{roles}</experience>"
+        "<education>" + "".join(f"<degree>{esc(e)}</degree>" for e in cv["education"]) + "</education>"
+        "<skills>" + "".join(f"<skill>{esc(s)}</skill>" for s in cv["skills"]) + "</skills></cv>\n"
+    ).encode("utf-8")
+
+
+WRITERS = {"pdf": make_pdf, "docx": make_docx, "xml": make_xml}
+
+
+def cv_corpus(sizes=tuple(SIZES), formats=tuple(WRITERS)):
+    """[(filename, bytes)] for every size and format, identical on every run"""
+    corpus = []
+    for size in sizes:
+        cv = cv_sections(size)
+        for fmt in formats:
+            corpus.append((f"cv-{size}.{fmt}", WRITERS[fmt](cv)))
+    return corpus
+
+
+def job_pages():
+    """{fixture name: html} for the saved job postings"""
+    pages = {}
+    for name in sorted(os.listdir(JOBS_DIR)):
+        if name.endswith(".html"):
+            with open(os.path.join(JOBS_DIR, name), encoding="utf-8") as f:
+                pages[name] = f.read()
+    return pages
@@ -0,0 +1,147 @@
+"""Stand-in for google.genai.Client that never touches the network.
+
+Replies are derived from a hash of the prompt, so the same input always
+streams the same text; a config with a response_schema gets fit JSON back
+instead of prose. Latency is simulated with sleeps: ttft before the
+first chunk, then chunk_delay between chunks of tokens_per_chunk tokens.
+"""
+import hashlib
+import itertools
+import json
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+from google.genai import errors
+
+from tokens import CHARS_PER_TOKEN
+
+_WORDS = ("the candidate has solid experience with python sql and cloud platforms which matches "
+          "most of the requirements listed in the posting although kubernetes exposure is limited "
+          "and the role asks for mentoring that should be highlighted in the cover letter").split()
+
+
+def _prompt_text(contents):
+    if isinstance(contents, str):
+        return contents
+    parts = []
+    for content in contents or []:
+        for part in getattr(content, "parts", None) or []:
+            parts.append(getattr(part, "text", "") or "")
+    return "\n".join(parts)
+
+
+def fake_reply(prompt, tokens):
+    """Deterministic text of about tokens tokens, with a parseable fit score"""
+    seed = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    rng = random.Random(seed)
+    words = [f"Fit score: {int(seed[:4], 16) % 101}/100\n"]
+    length = len(words[0])
+    while length < tokens * CHARS_PER_TOKEN:
+        word = rng.choice(_WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)
+
+
+def fake_fit_reply(prompt, tokens):
+    """Deterministic JSON in the shape of fit_result.FIT_SCHEMA, about tokens tokens long"""
+    seed = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    rng = random.Random(seed)
+
+    def sentence(share):
+        return " ".join(rng.choice(_WORDS) for _ in range(max(1, int(tokens * CHARS_PER_TOKEN * share / 7))))
+
+    score = int(seed[:4], 16) % 101
+    return json.dumps({
+        "company": "Acme",
+        "reputation": sentence(0.1),
+        "strengths": [sentence(0.08) for _ in range(3)],
+        "gaps": [sentence(0.08) for _ in range(2)],
+        "cultural_fit": sentence(0.1),
+        "probability": "high" if score >= 70 else "medium" if score >= 40 else "low",
+        "advice": [sentence(0.08) for _ in range(2)],
+        "score": score,
+        "explanation": sentence(0.15),
+    })
+
+
+def _reply(prompt, tokens, config):
+    if getattr(config, "response_schema", None) is not None:
+        return fake_fit_reply(prompt, tokens)
+    return fake_reply(prompt, tokens)
+
+
+class _Models:
+    def __init__(self, client):
+        self._client = client
+
+    def generate_content(self, model, contents, config=None):
+        text = self._client._begin(contents, config)
+        time.sleep(self._client.ttft + self._client.chunk_delay * len(self._client._chunks(text)))
+        return SimpleNamespace(text=text)
+
+    def generate_content_stream(self, model, contents, config=None):
+        # Raise on call, like the real client does before the first chunk
+        text = self._client._begin(contents, config)
+        return self._client._stream(text)
+
+
+class _Caches:
+    def __init__(self, client):
+        self._client = client
+        self._names = itertools.count(1)
+
+    def create(self, model, config=None):
+        self._client._count("caches_created")
+        return SimpleNamespace(name=f"cachedContents/fake-{next(self._names)}")
+
+    def update(self, name, config=None):
+        self._client._count("caches_updated")
+
+    def delete(self, name):
+        self._client._count("caches_deleted")
+
+
+class FakeClient:
+    """Offline genai client with simulated latency and optional 429s"""
+
+    def __init__(self, ttft=0.3, chunk_delay=0.02, tokens_per_chunk=8, response_tokens=400,
+                 error_rate=0.0, seed=0):
+        self.ttft = ttft
+        self.chunk_delay = chunk_delay
+        self.tokens_per_chunk = tokens_per_chunk
+        self.response_tokens = response_tokens
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "errors": 0, "prompt_chars": 0}
+        self.models = _Models(self)
+        self.caches = _Caches(self)
+
+    def _count(self, name, value=1):
+        with self._lock:
+            self.stats[name] = self.stats.get(name, 0) + value
+
+    def _begin(self, contents, config=None):
+        prompt = _prompt_text(contents)
+        self._count("calls")
+        self._count("prompt_chars", len(prompt))
+        with self._lock:
+            failed = self._rng.random() < self.error_rate
+        if failed:
+            self._count("errors")
+            raise errors.APIError(429, {"error": {"message": "Resource exhausted", "status": "RESOURCE_EXHAUSTED"}})
+        return _reply(prompt, self.response_tokens, config)
+
+    def _chunks(self, text):
+        size = self.tokens_per_chunk * CHARS_PER_TOKEN
+        return [text[i:i + size] for i in range(0, len(text), size)]
+
+    def _stream(self, text):
+        time.sleep(self.ttft)
+        for i, piece in enumerate(self._chunks(text)):
+            if i:
+                time.sleep(self.chunk_delay)
+            yield SimpleNamespace(text=piece)
@@ -0,0 +1,380 @@
+"""Offline benchmarks for the CV/job pipeline.
+
+    python bench/run.py [--users 8] [--repeat 5] [--out bench_output.json]
+                        [--baseline previous.json --tolerance 0.25]
+
+Covers CV extraction throughput, job page fetch-and-clean time, prompt
+token sizes and end-to-end interaction latency for concurrent simulated
+users. Gemini is replaced by bench/fake_genai.py and job pages are served
+from bench/fixtures/jobs by a local HTTP server, so runs are repeatable
+and need no network or API key. Prints one JSON object; with --baseline,
+also lists every *_ms figure that got slower by more than --tolerance and
+exits non-zero. It also exits non-zero when a ROUTE_CASES question is
+routed differently than expected.
+"""
+import argparse
+import functools
+import http.server
+import json
+import os
+import platform
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from chat_history import split_history, to_contents  # noqa: E402
+from cv_cache import CVTextCache  # noqa: E402
+from cv_extract import extract_cv_text  # noqa: E402
+from gemini_cache import ChatContextCache  # noqa: E402
+from fit_result import FieldStream, fit_config, parse_fit  # noqa: E402
+from job_clean import extract_main_text  # noqa: E402
+from job_fetch import JobPageFetcher, make_session  # noqa: E402
+from prompts import build_analysis_prompt, build_chat_prompt  # noqa: E402
+from router import FAST, FULL, LOCAL, chat_request, route_question  # noqa: E402
+from scheduler import GeminiScheduler  # noqa: E402
+from tokens import estimate_tokens  # noqa: E402
+from tracing import Trace, cache_hit_rates, label_shares, stage_percentiles  # noqa: E402
+
+from corpus import JOBS_DIR, cv_corpus, job_pages  # noqa: E402
+from fake_genai import FakeClient  # noqa: E402
+
+MODEL = "gemini-2.5-flash"
+FAST_MODEL = "gemini-2.5-flash-lite"
+# One question per chat route: local, fast, full
+CHAT_QUESTIONS = [
+    "What is the salary range for this role?",
+    "What does the team work on day to day?",
+    "Which of my skills are the strongest match?",
+    "What should I emphasise in a cover letter?",
+]
+
+
+# (question, job fixture, expected route, expected topic): real questions the
+# router once got wrong stay here so they cannot regress
+ROUTE_CASES = [
+    ("What is the salary range for this role?", "acme-python-engineer.html", LOCAL, "salary"),
+    ("How much does it pay?", "globex-nurse.html", LOCAL, "salary"),
+    ("How much experience do they require?", "acme-python-engineer.html", FAST, None),
+    ("How much travel is involved?", "acme-python-engineer.html", FAST, None),
+    ("Where is this job located?", "globex-nurse.html", LOCAL, "location"),
+    ("What's the office culture like?", "acme-python-engineer.html", FAST, None),
+    ("When is the closing date?", "globex-nurse.html", LOCAL, "deadline"),
+    ("When does the application close?", "globex-nurse.html", LOCAL, "deadline"),
+    ("How close is my background to what they want?", "globex-nurse.html", FULL, None),
+    ("What stage is the startup at?", "acme-python-engineer.html", FAST, None),
+    ("How many rounds of funding have they raised?", "acme-python-engineer.html", FAST, None),
+    ("How many interview rounds are there?", "acme-python-engineer.html", LOCAL, "process"),
+    ("Do they pay for relocation?", "acme-python-engineer.html", FAST, None),
+    ("What's the stock price?", "acme-python-engineer.html", FAST, None),
+    ("Do they offer stock options?", "acme-python-engineer.html", LOCAL, "benefits"),
+    ("Is the salary good for Berlin?", "acme-python-engineer.html", FULL, None),
+    ("What should I emphasise in a cover letter?", "acme-python-engineer.html", FULL, None),
+]
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def _summary(samples):
+    return {
+        "first_ms": round(samples[0], 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "min_ms": round(min(samples), 3),
+    }
+
+
+# -- CV extraction ---------------------------------------------------------
+
+def bench_extraction(corpus, repeat):
+    results = {}
+    for filename, data in corpus:
+        samples = []
+        for _ in range(repeat):
+            text, ms = _timed(lambda: extract_cv_text(filename, data))
+            samples.append(ms)
+        median_s = statistics.median(samples) / 1000
+        # One more run under tracemalloc, reading a view as the app does
+        tracemalloc.start()
+        extract_cv_text(filename, memoryview(data))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        results[filename] = {
+            "bytes": len(data),
+            "chars": len(text),
+            **_summary(samples),
+            "mb_per_s": round(len(data) / 1e6 / median_s, 3) if median_s else None,
+            "peak_kb": round(peak / 1024, 1),
+        }
+    return results
+
+
+# -- Job pages -------------------------------------------------------------
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def serve_fixtures():
+    """Background HTTP server for the saved job pages; returns (server, base url)"""
+    handler = functools.partial(_QuietHandler, directory=JOBS_DIR)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def bench_fetch_clean(base_url, pages, repeat):
+    results = {}
+    for name in pages:
+        url = f"{base_url}/{name}?utm_source=bench"
+        fetcher = JobPageFetcher(session=make_session())
+        page, cold_ms = _timed(lambda: fetcher.fetch(url))
+        _, cached_ms = _timed(lambda: fetcher.fetch(url))
+        # ttl=0 forces a conditional request; the fixture server answers 304
+        revalidating = JobPageFetcher(ttl=0, session=make_session())
+        revalidating.fetch(url)
+        _, revalidated_ms = _timed(lambda: revalidating.fetch(url))
+        samples = []
+        for _ in range(repeat):
+            cleaned, ms = _timed(lambda: extract_main_text(page.text))
+            samples.append(ms)
+        results[name] = {
+            "html_bytes": len(page.text.encode("utf-8")),
+            "fetch_cold_ms": round(cold_ms, 3),
+            "fetch_cached_ms": round(cached_ms, 3),
+            "fetch_revalidated_ms": round(revalidated_ms, 3),
+            "clean": _summary(samples),
+            "raw_tokens": cleaned.raw_tokens,
+            "clean_tokens": cleaned.clean_tokens,
+            "company": cleaned.company,
+        }
+    return results
+
+
+# -- Prompts ---------------------------------------------------------------
+
+def bench_prompts(cv_texts, job_texts):
+    results = {}
+    for cv_name, cv_text in cv_texts.items():
+        for job_name, job_text in job_texts.items():
+            analysis = build_analysis_prompt(cv_text, job_text)
+            chat = build_chat_prompt(cv_text, job_text, CHAT_QUESTIONS[0])
+            results[f"{cv_name} x {job_name}"] = {
+                "cv_tokens": estimate_tokens(cv_text),
+                "job_tokens": estimate_tokens(job_text),
+                "analysis_tokens": analysis.tokens,
+                "analysis_truncated": analysis.truncated,
+                "chat_tokens": chat.tokens,
+            }
+    return results
+
+
+# -- Chat routing ----------------------------------------------------------
+
+def check_routes(job_texts):
+    """[(question, expected, got)] for ROUTE_CASES the router answers differently"""
+    wrong = []
+    for question, job, path, topic in ROUTE_CASES:
+        route = route_question(question, job_texts[job])
+        if (route.path, route.topic if route.path == LOCAL else None) != (path, topic):
+            wrong.append((question, f"{path}/{topic}", f"{route.path}/{route.topic}"))
+    return wrong
+
+
+# -- End to end ------------------------------------------------------------
+
+def _stream(trace, scheduler, session_id, start, fields=None):
+    """Drain a scheduled stream, recording ttft and generation like chat_app.
+
+    With a FieldStream, also records when the first JSON field was complete.
+    """
+    text = ""
+    started = time.monotonic()
+    for chunk in scheduler.stream(session_id, start, base_delay=0.05, max_delay=1.0):
+        if chunk.text:
+            if not text:
+                trace.record("ttft", (time.monotonic() - started) * 1000)
+            text += chunk.text
+            if fields is not None and fields.feed(chunk.text) and len(fields.fields) == 1:
+                trace.record("first_field", (time.monotonic() - started) * 1000)
+    trace.record("generation", (time.monotonic() - started) * 1000)
+    return text
+
+
+def simulate_user(user, corpus, urls, shared, turns):
+    """One session: upload a CV, paste a job link, analyse, then chat"""
+    client, scheduler, cv_cache, fetcher = shared
+    session_id = f"user-{user}"
+    filename, data = corpus[user % len(corpus)]
+    url = urls[user % len(urls)]
+    traces = []
+
+    trace = Trace("analysis", session_id)
+    with trace.stage("cv_extract"):
+        cv_text, was_cached = cv_cache.lookup(filename, data)
+    trace.cache_result("cv_text", was_cached)
+    with trace.stage("job_fetch"):
+        page = fetcher.fetch(url)
+    trace.cache_result("job_page", page.from_cache)
+    with trace.stage("job_clean"):
+        job_text = extract_main_text(page.text).text
+    with trace.stage("prompt_build"):
+        prompt = build_analysis_prompt(cv_text, job_text)
+    trace.count("prompt_tokens", prompt.tokens)
+    analysis = _stream(trace, scheduler, session_id,
+                       lambda: client.models.generate_content_stream(model=MODEL, contents=prompt.text,
+                                                                     config=fit_config()),
+                       fields=FieldStream())
+    trace.count("fit_score", parse_fit(analysis).score)
+    traces.append(trace)
+
+    # Per session, as in chat_app; full-route turns reference it instead of resending the documents
+    context_cache = ChatContextCache(client, MODEL, scheduler=scheduler, session_id=session_id)
+    messages = []
+    for question in CHAT_QUESTIONS[:turns]:
+        trace = Trace("chat", session_id)
+        with trace.stage("route"):
+            route = route_question(question, job_text)
+        trace.count("route", route.path)
+        if route.path == LOCAL:
+            answer = route.answer
+        else:
+            earlier, recent = split_history(messages)
+            request = chat_request(route, cv_text, job_text, question, earlier, context_cache, FAST_MODEL, trace)
+            trace.count("prompt_tokens", request.prompt.tokens)
+            try:
+                answer = _stream(trace, scheduler, session_id, lambda: client.models.generate_content_stream(
+                    model=request.model, contents=to_contents(recent, request.prompt.text), config=request.config))
+            finally:
+                context_cache.done(request.cached)
+        messages += [{"role": "user", "content": question}, {"role": "assistant", "content": answer}]
+        traces.append(trace)
+    context_cache.invalidate()
+    return traces
+
+
+def bench_end_to_end(corpus, urls, args):
+    client = FakeClient(ttft=args.ttft, chunk_delay=args.chunk_delay, tokens_per_chunk=args.tokens_per_chunk,
+                        response_tokens=args.response_tokens, error_rate=args.error_rate)
+    scheduler = GeminiScheduler(requests_per_minute=args.rpm, max_in_flight=args.max_in_flight)
+    shared = (client, scheduler, CVTextCache(), JobPageFetcher(session=make_session()))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as pool:
+        futures = [pool.submit(simulate_user, user, corpus, urls, shared, args.turns) for user in range(args.users)]
+        traces = [trace for future in futures for trace in future.result()]
+    wall_s = time.perf_counter() - start
+
+    records = [trace.to_record() for trace in traces]
+    by_kind = {}
+    for kind in ("analysis", "chat"):
+        stats = stage_percentiles([r for r in records if r["kind"] == kind])
+        by_kind[kind] = {
+            stage: {k: round(v, 3) if k != "count" else v for k, v in values.items()}
+            for stage, values in stats.items()
+        }
+    return {
+        "users": args.users,
+        "interactions": len(records),
+        "wall_ms": round(wall_s * 1000, 3),
+        "interactions_per_s": round(len(records) / wall_s, 3),
+        "latency_ms": by_kind,
+        "chat_routes": {path: count for path, (count, _) in label_shares(records, "route").items()},
+        # hits are chat turns that referenced a cached context; counts, not timings
+        "caches": {name: {"hits": hits, "misses": misses} for name, (hits, misses) in cache_hit_rates(records).items()},
+        "scheduler": {"admitted": scheduler.admitted, "retried": scheduler.retried},
+        "fake_client": dict(client.stats),
+    }
+
+
+# -- Regression check ------------------------------------------------------
+
+def _flatten(value, prefix=""):
+    if isinstance(value, dict):
+        for key, inner in value.items():
+            yield from _flatten(inner, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield prefix, value
+
+
+def regressions(baseline, current, tolerance, floor_ms=1.0):
+    """[(metric, old, new)] for timings that grew by more than tolerance"""
+    old = dict(_flatten(baseline))
+    found = []
+    for name, new in _flatten(current):
+        before = old.get(name)
+        if "_ms" not in name or before is None:
+            continue
+        if max(before, new) >= floor_ms and new > before * (1 + tolerance):
+            found.append((name, before, new))
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="samples per extraction/clean measurement")
+    parser.add_argument("--users", type=int, default=8, help="concurrent simulated sessions")
+    parser.add_argument("--turns", type=int, default=3, help="chat questions per session after the analysis")
+    parser.add_argument("--rpm", type=int, default=600, help="scheduler quota for the fake model")
+    parser.add_argument("--max-in-flight", type=int, default=8)
+    parser.add_argument("--ttft", type=float, default=0.3, help="fake seconds before the first chunk")
+    parser.add_argument("--chunk-delay", type=float, default=0.02, help="fake seconds between chunks")
+    parser.add_argument("--tokens-per-chunk", type=int, default=8)
+    parser.add_argument("--response-tokens", type=int, default=400)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of fake calls failing with 429")
+    parser.add_argument("--out", default="bench_output.json", help="where to write the JSON ('-' for stdout only)")
+    parser.add_argument("--baseline", help="earlier output to compare timings against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    corpus = cv_corpus()
+    pages = job_pages()
+    server, base_url = serve_fixtures()
+    try:
+        cv_texts = {name: extract_cv_text(name, data) for name, data in corpus}
+        job_texts = {name: extract_main_text(html).text for name, html in pages.items()}
+        results = {
+            "meta": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "started": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "args": vars(args),
+            },
+            "extraction": bench_extraction(corpus, args.repeat),
+            "fetch_clean": bench_fetch_clean(base_url, pages, args.repeat),
+            "prompts": bench_prompts(cv_texts, job_texts),
+            "route_mistakes": check_routes(job_texts),
+            "end_to_end": bench_end_to_end(corpus, [f"{base_url}/{name}" for name in pages], args),
+        }
+    finally:
+        server.shutdown()
+
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.out != "-":
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+    for question, expected, got in results["route_mistakes"]:
+        print(f"ROUTE {question!r}: expected {expected}, got {got}", file=sys.stderr)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            slower = regressions(json.load(f), results, args.tolerance)
+        for name, before, after in slower:
+            print(f"REGRESSION {name}: {before:.1f} -> {after:.1f} ms", file=sys.stderr)
+        return 1 if slower or results["route_mistakes"] else 0
+    return 1 if results["route_mistakes"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
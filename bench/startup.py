@@ -0,0 +1,85 @@
+"""Measure cold-start and per-rerun overhead of chat_app.py.
+
+    python bench/startup.py [--reruns 20] [--out startup.json]
+
+Each measurement runs in a fresh interpreter so earlier imports don't hide
+the cost. Prints one JSON object.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ["streamlit", "google.genai", "pdfplumber", "docx", "bs4"]
+APP_MODULES = [
+    "cv_cache", "cv_extract", "job_fetch", "job_clean", "job_store", "prompts",
+    "response_cache", "gemini_cache", "chat_history", "company_intel", "scheduler",
+]
+
+IMPORT_PROBE = """
+import json, sys, time
+result = {}
+for name in sys.argv[1].split(","):
+    start = time.perf_counter()
+    __import__(name)
+    result[name] = round((time.perf_counter() - start) * 1000, 2)
+print(json.dumps({"import_ms": result, "parsers_loaded": [m for m in ("pdfplumber", "docx", "bs4") if m in sys.modules]}))
+"""
+
+APP_PROBE = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file(sys.argv[1], default_timeout=120)
+app.secrets["general"] = {"JOB_GEMINI_KEY": "benchmark-key"}
+start = time.perf_counter()
+app.run()
+first = time.perf_counter() - start
+reruns = []
+for _ in range(int(sys.argv[2])):
+    start = time.perf_counter()
+    app.run()
+    reruns.append(time.perf_counter() - start)
+reruns.sort()
+print(json.dumps({
+    "first_run_ms": round(first * 1000, 2),
+    "rerun_ms_p50": round(reruns[len(reruns) // 2] * 1000, 2),
+    "rerun_ms_max": round(reruns[-1] * 1000, 2),
+    "exceptions": [str(e.value) for e in app.exception],
+    "parsers_loaded": [m for m in ("pdfplumber", "docx", "bs4") if m in sys.modules],
+}))
+"""
+
+
+def probe(code, *args):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    completed = subprocess.run(
+        [sys.executable, "-c", code, *args],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--out", help="also write the JSON here")
+    args = parser.parse_args(argv)
+
+    results = {
+        "heavy_imports": probe(IMPORT_PROBE, ",".join(HEAVY_MODULES)),
+        "app_module_imports": probe(IMPORT_PROBE, ",".join(APP_MODULES)),
+        "app": probe(APP_PROBE, os.path.join(ROOT, "chat_app.py"), str(args.reruns)),
+    }
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
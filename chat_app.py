@@ -1,54 +1,183 @@
 import os
 import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
 import streamlit as st
 import requests
-from bs4 import BeautifulSoup
-import pdfplumber
-import xml.etree.ElementTree as ET
-from docx import Document
+import httpx
 
 from google import genai
+from google.genai import types
 from dotenv import load_dotenv
 load_dotenv()
 
+from chat_history import split_history, to_contents
+from company_intel import CompanyIntelService, summarize_intel
+from cv_cache import CVTextCache
+from cv_model import parse_cv
+from fit_result import FieldStream, fit_config, fit_markdown, parse_fit, to_json
+from gemini_cache import ChatContextCache
+from job_clean import extract_main_text, tokens_saved
+from job_fetch import JobPageFetcher
+from job_store import JobStore
+from prompts import PROMPT_VERSION, build_analysis_prompt
+from response_cache import ResponseCache, response_key
+from router import FAST, FULL, LOCAL, chat_request, route_question
+from scheduler import GeminiScheduler
+from tasks import CANCELLED, DONE, FAILED, TaskCancelled, TaskPool
+from tracing import Trace, TraceLog
+from uploads import UploadRejected, peak_rss_mb, read_upload, session_bytes
+from tokens import estimate_tokens
+
 # Gemini API config
 #API_KEY = st.secrets["general"]["GEMINI_API_KEY"] #os.getenv("GEMINI_API_KEY", "JOB_GEMINI_KEY")
 API_KEY = st.secrets["general"]["JOB_GEMINI_KEY"]
 
-client = genai.Client(api_key=API_KEY)
+MODEL = "gemini-2.5-flash"
+# Cheaper tier for chat questions that need a model but no advice; "" sends them to MODEL
+FAST_MODEL = os.getenv("CHAT_FAST_MODEL", "gemini-2.5-flash-lite")
+ROUTE_LABELS = {
+    LOCAL: "📄 Quoted from the job posting",
+    FAST: f"⚡ Quick answer ({FAST_MODEL})",
+    FULL: f"🧠 Full answer ({MODEL}, CV and job in context)",
+}
+# Saved postings older than this are fetched again
+JOB_STORE_MAX_AGE = int(os.getenv("JOB_STORE_MAX_AGE", str(24 * 3600)))
+# Background analyses one session may start before being asked
+SPECULATIVE_BUDGET = int(os.getenv("SPECULATIVE_BUDGET", "3"))
+# Comparison mode: postings per comparison, and analyses running at once
+MAX_COMPARE_JOBS = int(os.getenv("MAX_COMPARE_JOBS", "6"))
+COMPARE_PARALLEL = int(os.getenv("COMPARE_PARALLEL", "3"))
 
 # --Helper functions --
-def fetch_company_reviews(company_name): 
-    reviews_text = "" 
-    # Example: Indeed company reviews page 
-    url = f"https://www.indeed.com/cmp/{company_name}/reviews" 
-    try: 
-        response = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}) 
-        soup = BeautifulSoup(response.text, "html.parser") 
-        # Grab some snippets of reviews (class names may change!) 
-        snippets = soup.find_all("div") 
-        for snip in snippets[:3]: 
-            text = snip.get_text(strip=True) 
-            if text: 
-                reviews_text += "- " + text[:200] + "...\n" 
-    except Exception as e: 
-        reviews_text = f"Error fetching reviews: {e}" 
-    return reviews_text
-
-def fetch_company_news(company_name): 
-    news_text = "" 
-    url = f"https://news.google.com/search?q={company_name}" 
-    try: 
-        response = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}) 
-        soup = BeautifulSoup(response.text, "html.parser") 
-        headlines = soup.find_all("a", {"class": "DY5T1d"}) 
-        for h in headlines[:5]: 
-            news_text += "- " + h.get_text() + "\n" 
-    except Exception as e: 
-        news_text = f"Error fetching news: {e}" 
-    return news_text
+@st.cache_resource
+def get_client(api_key):
+    # One client (and one pooled HTTP transport) per process instead of one per rerun
+    return genai.Client(
+        api_key=api_key,
+        http_options=types.HttpOptions(
+            client_args={"limits": httpx.Limits(max_connections=50, max_keepalive_connections=20)}
+        ),
+    )
+
+client = get_client(API_KEY)
+
+@st.cache_resource
+def get_cv_cache():
+    # Shared by every session, so the same CV is only ever parsed once
+    return CVTextCache(disk_dir=os.getenv("CV_CACHE_DIR"))
+
+@st.cache_resource
+def get_job_fetcher():
+    # One keep-alive pool and page cache for the whole process
+    return JobPageFetcher(ttl=int(os.getenv("JOB_PAGE_TTL", "600")))
+
+@st.cache_resource
+def get_scheduler():
+    # Shared by every session so the whole process stays within the Gemini quota
+    return GeminiScheduler(requests_per_minute=int(os.getenv("GEMINI_RPM", "10")),
+                           max_in_flight=int(os.getenv("GEMINI_MAX_IN_FLIGHT", "8")))
+
+def queue_notice(placeholder):
+    def show(position, eta):
+        # eta is None while the task waits for a worker rather than for quota
+        placeholder.info(f"⏳ The advisor is busy: you're #{position} in line"
+                         + (f" (about {eta:.0f}s)." if eta is not None else "."))
+    return show
+
+@st.cache_resource
+def get_task_pool():
+    # Generation outlives the script run that started it. Waiting threads just
+    # sleep in the scheduler's fair queue, so there are far more workers than
+    # GEMINI_MAX_IN_FLIGHT: quota, not the pool, decides who goes next.
+    return TaskPool(max_workers=int(os.getenv("TASK_WORKERS", "64")))
+
+def stream_into(task, task_trace, scheduler, session_id, start, fields=None):
+    """Worker side: stream one scheduled Gemini call into task.
+
+    With a FieldStream, JSON fields are parsed as they complete and published
+    in task.meta["fields"].
+    """
+    def on_wait(position, eta):
+        if task.cancelled:
+            # Leave the queue rather than spend quota on an abandoned request
+            raise TaskCancelled()
+        task.update(queue=(position, eta))
+
+    generation_started = time.monotonic()
+    # Admitted: no longer in line, even though the first chunk is still to come
+    for chunk in scheduler.stream(session_id, lambda: iter(()) if task.cancelled else start(), on_wait=on_wait,
+                                  on_admit=lambda: task.update(queue=None)):
+        if task.cancelled:
+            break
+        if chunk.text:
+            if not task.text:
+                task_trace.record("ttft", (time.monotonic() - generation_started) * 1000)
+            task.append(chunk.text)
+            if fields is not None and fields.feed(chunk.text):
+                task.update(fields=dict(fields.fields))
+    task_trace.record("generation", (time.monotonic() - generation_started) * 1000)
+    task_trace.count("response_tokens", estimate_tokens(task.text))
+
+def show_task(task, placeholder, render=lambda task: task.text, idle="🤔 Thinking..."):
+    """Script side: render a task's output as it grows, until it finishes or a rerun"""
+    shown = None
+    for _ in task.follow():
+        # Streamlit only notices a rerun (a click, new input) inside st.* calls and
+        # session_state access, so touch it on every heartbeat, changed or not
+        st.session_state.get("session_id")
+        text = render(task)
+        queue = task.meta.get("queue")
+        if text:
+            if text != shown:
+                placeholder.markdown(text)
+                shown = text
+        elif queue:
+            queue_notice(placeholder)(*queue)
+            shown = None
+        elif shown != idle:
+            placeholder.write(idle)
+            shown = idle
+
+def show_error(e):
+    if isinstance(e, requests.exceptions.Timeout):
+        st.error("⏳ The request took too long and timed out. Please try again later.")
+    elif isinstance(e, requests.exceptions.RequestException):
+        st.error("⚠️ Network issue detected. Please check your connection.")
+    else:
+        st.error("❌ Something went wrong while processing your request.")
+        st.text(f"Details: {str(getattr(e, 'message', None) or e)[:78]}")
+
+@st.cache_resource
+def get_trace_log():
+    return TraceLog(os.getenv("TRACE_LOG_PATH", os.path.join(".cache", "requests.jsonl")))
+
+@st.cache_resource
+def get_job_store():
+    return JobStore(os.getenv("JOB_STORE_PATH", os.path.join(".cache", "job_postings.sqlite3")))
+
+@st.cache_resource
+def get_response_cache():
+    return ResponseCache(os.getenv("RESPONSE_CACHE_PATH", os.path.join(".cache", "responses.sqlite3")),
+                         ttl=int(os.getenv("RESPONSE_CACHE_TTL", str(7 * 24 * 3600))))
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def clean_job_page(html):
+    return extract_main_text(html)
+
+@st.cache_resource
+def get_company_intel():
+    # Shares the job fetcher's keep-alive pool
+    return CompanyIntelService(session=get_job_fetcher().session,
+                               deadline=float(os.getenv("COMPANY_INTEL_DEADLINE", "6")))
 
 st.set_page_config(page_title="CV + Job Fit Advisor", layout="wide")
+
+# Identifies this browser session to the shared scheduler
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+trace = Trace(session_id=st.session_state.session_id)
 st.markdown("""
             <div class="tooltip">&#9432;
             <span class="tooltiptext">
@@ -56,6 +185,7 @@ st.markdown("""
             Click 'Analyze CV vs Job Fit' for relevant feedback, 
             or type a question in the text-field at the bottom to chat with the AI 
             (Wait for the AI's response to each question). 
+            Open 'Compare several jobs' to rank up to six listings against your CV side by side.
             Click 'Reset' under the header or 'Start over', when it appears, to clear the page or start over, as appropriate.
             </span>
             </div>
@@ -85,10 +215,19 @@ if st.button("Reset", width="content", type="secondary"):
     company_info = ""
     url = ""
     st.session_state.messages = []
+    # Stop this session's background generation too
+    get_task_pool().cancel(st.session_state.session_id)
+    st.session_state.analysis_request = None
+    st.session_state.speculative_request = None
+    st.session_state.chat_pending = None
+    st.session_state.comparison = None
+    if "context_cache" in st.session_state:
+        st.session_state.context_cache.invalidate()
     st.rerun()
 
 # --- Upload CV ---
 cv_text = ""
+upload = None
 uploaded_file = st.file_uploader("Share your CV", type=["pdf", "xml", "docx"])
 
 # if uploaded_file:
@@ -98,36 +237,72 @@ uploaded_file = st.file_uploader("Share your CV", type=["pdf", "xml", "docx"])
 #             if text:
 #                 cv_text += text + "\n"
 #     st.success("CV received and text extracted!")
-if uploaded_file: 
-    if uploaded_file.name.endswith(".pdf"): 
-        with pdfplumber.open(uploaded_file) as pdf: 
-            for page in pdf.pages: 
-                text = page.extract_text() 
-                if text: 
-                    cv_text += text + "\n" 
-
-    elif uploaded_file.name.endswith(".xml"): 
-        tree = ET.parse(uploaded_file) 
-        root = tree.getroot() 
-        cv_text = " ".join([elem.text for elem in root.iter() if elem.text]) 
-
-    elif uploaded_file.name.endswith(".docx"): 
-        doc = Document(uploaded_file) 
-        cv_text = "\n".join([para.text for para in doc.paragraphs]) 
-    st.success("CV received. Ensure there's a job link added before initiating analysis/chat.") 
+if uploaded_file:
+    cv_text_area = st.empty()
+
+    def show_extraction_progress(text, pages_done, page_count):
+        cv_text_area.text_area(f"Extracted CV Text (page {pages_done} of {page_count})", text, height=300)
 
-    st.text_area("Extracted CV Text", cv_text, height=300)
+    try:
+        # Page and archive limits are checked once per uploaded file
+        upload = read_upload(uploaded_file, check_contents=st.session_state.get("checked_upload") != uploaded_file.file_id)
+        st.session_state.checked_upload = uploaded_file.file_id
+    except UploadRejected as e:
+        st.error(f"⚠️ {e}")
+        upload = None
+if upload:
+    with trace.stage("cv_extract"):
+        cv_text, cv_cached = get_cv_cache().lookup(upload.name, upload.data, show_extraction_progress)
+    trace.cache_result("cv_text", cv_cached)
+    trace.count("cv_bytes", upload.size)
+    trace.count("cv_chars", len(cv_text))
+    cv_text_area.text_area("Extracted CV Text", cv_text, height=300)
+    parsed_cv = parse_cv(cv_text)
+    if parsed_cv.roles or parsed_cv.skills or parsed_cv.education:
+        st.caption(f"Recognised {len(parsed_cv.roles)} roles, {len(parsed_cv.skills)} skills and "
+                   f"{len(parsed_cv.education)} education entries; prompts include only the sections each question needs.")
+    st.success("CV received. Ensure there's a job link added before initiating analysis/chat.") 
 
 # --- Enter Job URL --- 
 job_url = st.text_input("*Enter the job description URL to analyze or ask about*:", placeholder="e.g. https://joblink.domain") 
 job_text = "" 
 company_info = "" 
+job_company = None
 if job_url and job_url.startswith("https://") or job_url.startswith("http://"): 
     try: 
-        response = requests.get(job_url, headers={"User-Agent": "Mozilla/5.0"}) 
-        soup = BeautifulSoup(response.text, "html.parser") 
-        job_text = soup.get_text(separator="\n") 
+        with trace.stage("job_store_lookup"):
+            saved_posting = get_job_store().get(job_url, max_age=JOB_STORE_MAX_AGE)
+        trace.cache_result("job_store", saved_posting is not None)
+        if saved_posting:
+            # Seen before: no download or HTML parsing needed
+            job_text = saved_posting.text
+            job_company = saved_posting.company
+        else:
+            with trace.stage("job_fetch"):
+                job_page = get_job_fetcher().fetch(job_url)
+            trace.cache_result("job_page", job_page.from_cache)
+            trace.count("job_html_bytes", len(job_page.text))
+            with trace.stage("job_clean"):
+                cleaned = clean_job_page(job_page.text)
+            job_text = cleaned.text
+            job_company = cleaned.company
+            get_job_store().save(job_url, job_text, job_company)
+        trace.count("job_chars", len(job_text))
         st.success("Job description loaded! You may now chat with AI advisor. Or, if you haven't, add a CV for analysis.") 
+        if saved_posting:
+            st.caption("Loaded from previously seen postings.")
+            if st.button("🔄 Fetch this posting again", width="content"):
+                # The saved copy may be outdated or badly cleaned
+                get_job_store().forget(job_url)
+                get_job_fetcher().invalidate(job_url)
+                st.rerun()
+        else:
+            st.caption(f"Trimmed ~{tokens_saved(cleaned):,} tokens of page boilerplate (~{cleaned.clean_tokens:,} tokens kept).")
+        similar_postings = get_job_store().similar(job_url, limit=3)
+        if similar_postings:
+            with st.expander("Similar roles you've looked at"):
+                for similar_url, similar_company, shared in similar_postings:
+                    st.markdown(f"- [{similar_company or similar_url}]({similar_url}) ({shared} shared keywords)")
      
         # --- Simple heuristic: Gemini can infer company name from job_text --- 
         # For now, just display job_text and let Gemini extract company name later 
@@ -137,53 +312,237 @@ else:
     st.warning("⚠️ You must provide a valid URL above.")    
 
 # --- One-click Fit Analysis ---
-if st.button("🔍 Analyze CV vs Job Fit", disabled=not cv_text or not job_text):
-    try:
-        placeholding = st.empty()
-        placeholding.write("🤔 Thinking...")
-        heading_shown = False
-        full_text = ""
-
-        context = f"""
-        Candidate CV:
-        {cv_text}
-
-        Job Description:
-        {job_text}
-
-        Task:
-        Provide a structured analysis:
-        - Extract probable company name from {job_text}
-        - Comment on company reputation (if the information is available).
-        - Candidate key strengths (skills/experience that match).
-        - Gaps or missing qualifications.
-        - Evaluate cultural fit based on company values and candidate’s background.
-        - Probability of fit (low/medium/high).
-        - Advice to improve chances.
-        - Numeric fit score (0–100) with explanation.
-        """
-        # Streaming call for the new google.genai api
-        for chunk in client.models.generate_content_stream(model="gemini-2.5-flash",contents=context):
-            if chunk.text:
-                full_text += chunk.text
-                if not heading_shown:
-                    st.markdown("### Fit Analysis")
-                    heading_shown = True
-                    #print(chunk.text, end="", flush=True) 
-                placeholding.markdown(full_text) 
-
-        st.write("✅ Done!")
-
-    except requests.exceptions.Timeout:
-        st.error("⏳ The request took too long and timed out. Please try again later.")
-
-    except requests.exceptions.RequestException as e:
-        st.error("⚠️ Network issue detected. Please check your connection.")
-        #st.text(f"Details: {e}")
+# Generation runs in the shared task pool, so a rerun (any click) detaches
+# from it instead of throwing it away; the next run attaches again.
+if "analysis_request" not in st.session_state:
+    st.session_state.analysis_request = None
+
+analysis_prompt = None
+analysis_key = None
+if cv_text and job_text:
+    with trace.stage("prompt_build"):
+        analysis_prompt = build_analysis_prompt(cv_text, job_text)
+    analysis_key = response_key(cv_text, job_text, MODEL, PROMPT_VERSION)
+    st.caption(f"Estimated prompt size: ~{analysis_prompt.tokens:,} tokens"
+               + (f" ({', '.join(analysis_prompt.truncated)} shortened to fit)" if analysis_prompt.truncated else ""))
+
+def run_analysis(cv_text, job_text, job_company, analysis_key, session_id):
+    # Resolved here: worker threads have no Streamlit context of their own
+    scheduler, response_cache, company_intel_service, trace_log = (
+        get_scheduler(), get_response_cache(), get_company_intel(), get_trace_log())
+
+    def job(task):
+        task_trace = Trace("analysis", session_id)
+        try:
+            cached_analysis = response_cache.get(analysis_key)
+            task_trace.cache_result("analysis", cached_analysis is not None)
+            if cached_analysis is not None:
+                # Stored already parsed, so every field shows at once
+                result = parse_fit(cached_analysis)
+                task.append(cached_analysis)
+                task.update(from_cache=True, result=result, fields=result._asdict())
+            else:
+                prompt = build_analysis_prompt(cv_text, job_text)
+                if job_company:
+                    # News and reviews run concurrently under one deadline
+                    with task_trace.stage("company_intel"):
+                        company_intel = company_intel_service.get(job_company)
+                    task.update(company_intel=company_intel)
+                    company_info = summarize_intel(company_intel)
+                    if company_info:
+                        prompt = build_analysis_prompt(cv_text, job_text, company_info)
+                task_trace.count("prompt_tokens", prompt.tokens)
+                stream_into(task, task_trace, scheduler, session_id,
+                            lambda: client.models.generate_content_stream(
+                                model=MODEL, contents=prompt.text, config=fit_config()),
+                            fields=FieldStream())
+                if task.text and not task.cancelled:
+                    result = parse_fit(task.text)
+                    task.update(result=result)
+                    response_cache.put(analysis_key, to_json(result))
+        finally:
+            trace_log.write(task_trace)
+    return job
+
+# Opt-in: start the analysis (company news included) as soon as both inputs
+# are in, so the click only attaches to it. Guesses that go stale are
+# cancelled, and each session may start at most SPECULATIVE_BUDGET of them.
+if "speculative_request" not in st.session_state:
+    st.session_state.speculative_request = None
+    st.session_state.speculative_used = 0
+speculate = st.toggle("⚡ Prepare the analysis as soon as a CV and job link are in",
+                      value=os.getenv("SPECULATIVE_DEFAULT", "0") == "1",
+                      help=f"Runs up to {SPECULATIVE_BUDGET} analyses per session in the background before you ask.")
+current_request = f"analysis:{analysis_key}" if analysis_key else None
+guess = st.session_state.speculative_request
+if guess and guess != st.session_state.analysis_request and (guess != current_request or not speculate):
+    # The CV or job changed (or the mode was switched off) before anyone asked
+    get_task_pool().cancel(st.session_state.session_id, guess)
+    st.session_state.speculative_request = guess = None
+if (speculate and current_request and guess is None
+        and st.session_state.analysis_request != current_request
+        and get_task_pool().get(st.session_state.session_id, current_request) is None):
+    if st.session_state.speculative_used >= SPECULATIVE_BUDGET:
+        st.caption("⚡ Background analysis budget used up for this session; click Analyze when ready.")
+    elif get_response_cache().get(analysis_key) is None:
+        # A cached answer replays instantly anyway, so only uncached work is started
+        get_task_pool().submit(st.session_state.session_id, current_request,
+                               run_analysis(cv_text, job_text, job_company, analysis_key, st.session_state.session_id))
+        st.session_state.speculative_used += 1
+        st.session_state.speculative_request = guess = current_request
+if guess and guess == current_request and st.session_state.analysis_request != guess:
+    guess_task = get_task_pool().get(st.session_state.session_id, guess)
+    if guess_task and guess_task.status == DONE:
+        st.caption("⚡ Analysis ready: click Analyze to see it.")
+    elif guess_task and not guess_task.finished:
+        st.caption("⚡ Preparing the analysis in the background...")
 
-    except Exception as e:
-        st.error("❌ Something went wrong while processing your request.")
-        st.text(f"Details: {e.message[:78]}")            
+if st.button("🔍 Analyze CV vs Job Fit", disabled=not cv_text or not job_text):
+    request_id = f"analysis:{analysis_key}"
+    # Same inputs while it runs (or after it finished) attach to the same task
+    get_task_pool().submit(st.session_state.session_id, request_id,
+                           run_analysis(cv_text, job_text, job_company, analysis_key, st.session_state.session_id))
+    st.session_state.analysis_request = request_id
+    # Asked for now, so no longer a guess to cancel when inputs change
+    if st.session_state.speculative_request == request_id:
+        st.session_state.speculative_request = None
+
+analysis_task = None
+if analysis_key and st.session_state.analysis_request == f"analysis:{analysis_key}":
+    analysis_task = get_task_pool().get(st.session_state.session_id, st.session_state.analysis_request)
+if analysis_task:
+    st.markdown("### Fit Analysis")
+    placeholding = st.empty()
+    show_task(analysis_task, placeholding, render=lambda task: fit_markdown(task.meta.get("fields", {})))
+    if analysis_task.status == DONE:
+        st.write("✅ Done! (from cache)" if analysis_task.meta.get("from_cache") else "✅ Done!")
+        company_intel = analysis_task.meta.get("company_intel")
+        if company_intel and (company_intel.news or company_intel.reviews):
+            with st.expander(f"Company news & reviews: {company_intel.company}"):
+                st.text(summarize_intel(company_intel))
+    elif analysis_task.status == FAILED:
+        show_error(analysis_task.error)
+
+# --- Compare several jobs ---
+# The postings are loaded concurrently and every analysis reuses the CV text
+# extracted above. At most COMPARE_PARALLEL analyses run at once, each
+# streaming into its own column; the ranking fills in as scores arrive.
+if "comparison" not in st.session_state:
+    st.session_state.comparison = None
+
+def load_postings(urls):
+    """{url: (job_text, company) or the exception raised}, fetched and cleaned concurrently"""
+    job_store, fetcher = get_job_store(), get_job_fetcher()
+
+    def load(url):
+        saved = job_store.get(url, max_age=JOB_STORE_MAX_AGE)
+        if saved:
+            return saved.text, saved.company
+        cleaned = extract_main_text(fetcher.fetch(url).text)
+        job_store.save(url, cleaned.text, cleaned.company)
+        return cleaned.text, cleaned.company
+
+    with ThreadPoolExecutor(max_workers=min(len(urls), 8)) as pool:
+        futures = {url: pool.submit(load, url) for url in urls}
+    postings = {}
+    for url, future in futures.items():
+        try:
+            postings[url] = future.result()
+        except Exception as e:
+            postings[url] = e
+    return postings
+
+def cancel_comparison(comparison):
+    for entry in comparison["entries"]:
+        if entry["request_id"]:
+            get_task_pool().cancel(st.session_state.session_id, entry["request_id"])
+
+COMPARE_STATUS = {"pending": "⏸️ Queued", "running": "🤔 Thinking...", "cancelled": "Cancelled"}
+
+def comparison_rows(entries, tasks):
+    """Ranking table rows: scored jobs first, best first"""
+    rows = []
+    for entry, task in zip(entries, tasks):
+        fields = task.meta.get("fields", {}) if task else {}
+        status = "failed" if entry["error"] else task.status if task else "expired"
+        rows.append({"job": entry["label"], "score": fields.get("score"),
+                     "probability": fields.get("probability"), "status": status, "link": entry["url"]})
+    rows.sort(key=lambda row: (row["score"] is None, -(row["score"] or 0)))
+    return [{"rank": i + 1 if row["score"] is not None else None, **row} for i, row in enumerate(rows)]
+
+def show_comparison(entries, placeholders, ranking):
+    """Script side: stream every column and keep the ranking current, until all finish or a rerun"""
+    tasks = [get_task_pool().get(st.session_state.session_id, entry["request_id"]) if entry["request_id"] else None
+             for entry in entries]
+    shown = {}
+    while True:
+        versions = [task.version if task else None for task in tasks]
+        if versions != shown.get("versions"):
+            for i, (entry, task) in enumerate(zip(entries, tasks)):
+                if entry["error"]:
+                    text = f"❌ Could not load this posting: {entry['error'][:120]}"
+                elif task is None:
+                    text = "Expired; click Compare again."
+                elif task.status == FAILED:
+                    text = f"❌ {str(task.error)[:120]}"
+                else:
+                    queue = task.meta.get("queue")
+                    text = (fit_markdown(task.meta.get("fields", {}))
+                            or (f"⏳ #{queue[0]} in line" if queue else COMPARE_STATUS.get(task.status, "")))
+                if text != shown.get(i):
+                    placeholders[i].markdown(text)
+                    shown[i] = text
+            ranking.dataframe(comparison_rows(entries, tasks), hide_index=True,
+                              column_config={"link": st.column_config.LinkColumn()})
+            shown["versions"] = versions
+        if all(task is None or task.finished for task in tasks):
+            return
+        # Give Streamlit its chance to notice a rerun, as in show_task
+        st.session_state.get("comparison")
+        time.sleep(0.25)
+
+with st.expander("📊 Compare several jobs", expanded=st.session_state.comparison is not None):
+    compare_input = st.text_area("Job URLs to compare, one per line", placeholder="https://joblink.domain/one\nhttps://joblink.domain/two")
+    compare_urls = list(dict.fromkeys(
+        line.strip() for line in compare_input.splitlines() if line.strip().startswith(("https://", "http://"))))
+    if len(compare_urls) > MAX_COMPARE_JOBS:
+        st.caption(f"Only the first {MAX_COMPARE_JOBS} links are compared.")
+        compare_urls = compare_urls[:MAX_COMPARE_JOBS]
+    if st.button("📊 Compare", disabled=not cv_text or len(compare_urls) < 2):
+        if st.session_state.comparison:
+            cancel_comparison(st.session_state.comparison)
+        with trace.stage("compare_load"), st.spinner(f"Loading {len(compare_urls)} job postings..."):
+            postings = load_postings(compare_urls)
+        entries, jobs = [], []
+        for url, posting in postings.items():
+            entry = {"url": url, "label": urlparse(url).netloc, "request_id": None, "error": None}
+            if isinstance(posting, Exception):
+                entry["error"] = str(posting)
+            else:
+                compare_text, compare_company = posting
+                compare_key = response_key(cv_text, compare_text, MODEL, PROMPT_VERSION)
+                entry.update(label=compare_company or entry["label"], request_id=f"compare:{compare_key}")
+                jobs.append((entry["request_id"], run_analysis(cv_text, compare_text, compare_company, compare_key,
+                                                               st.session_state.session_id)))
+            entries.append(entry)
+        get_task_pool().submit_many(st.session_state.session_id, jobs, limit=COMPARE_PARALLEL)
+        st.session_state.comparison = {"cv_text": cv_text, "entries": entries}
+        trace.count("compare_jobs", len(entries))
+
+comparison = st.session_state.comparison
+if comparison and comparison["cv_text"] != cv_text:
+    # A different CV (or none): these results no longer apply
+    cancel_comparison(comparison)
+    st.session_state.comparison = comparison = None
+if comparison:
+    st.markdown("### Job comparison")
+    ranking = st.empty()
+    placeholders = []
+    for column, entry in zip(st.columns(len(comparison["entries"])), comparison["entries"]):
+        with column:
+            st.markdown(f"**{entry['label']}**")
+            placeholders.append(st.empty())
+    show_comparison(comparison["entries"], placeholders, ranking)
 
 # # --- Enter Job URL ---
 # url = st.text_input("Enter the job description URL:", placeholder="e.g. https://joblink.whatever")
@@ -200,85 +559,116 @@ if st.button("🔍 Analyze CV vs Job Fit", disabled=not cv_text or not job_text)
 # --- Chat Interface ---
 if "messages" not in st.session_state:
     st.session_state.messages = []
-
-# Initialize lock flag
-if "busy" not in st.session_state:
-    st.session_state.busy = False    
+# (request_id, question) of the answer being generated in the background
+if "chat_pending" not in st.session_state:
+    st.session_state.chat_pending = None
+
+# Server-side cached CV + job context for this session's chat
+if "context_cache" not in st.session_state:
+    st.session_state.context_cache = ChatContextCache(client, MODEL, ttl=int(os.getenv("CHAT_CONTEXT_TTL", "900")),
+                                                      scheduler=get_scheduler(), session_id=st.session_state.session_id)
+st.session_state.context_cache.release_if_stale(cv_text, job_text)
+
+def run_chat(cv_text, job_text, question, messages, context_cache, session_id, route):
+    scheduler, trace_log = get_scheduler(), get_trace_log()
+
+    def job(task):
+        task_trace = Trace("chat", session_id)
+        task_trace.count("route", route.path)
+        task.update(route=route.path)
+        request = None
+        try:
+            earlier, recent = split_history(messages)
+            request = chat_request(route, cv_text, job_text, question, earlier, context_cache, FAST_MODEL, task_trace)
+            history_tokens = sum(estimate_tokens(msg["content"]) for msg in recent)
+            task_trace.count("prompt_tokens", request.prompt.tokens + history_tokens)
+            task.update(prompt_tokens=request.prompt.tokens + history_tokens, cached_context=bool(request.cached))
+            stream_into(task, task_trace, scheduler, session_id, lambda: client.models.generate_content_stream(
+                model=request.model,
+                contents=to_contents(recent, request.prompt.text),
+                config=request.config
+            ))
+        finally:
+            if request:
+                # The CV or job may have changed meanwhile; only now may its cache go
+                context_cache.done(request.cached)
+            trace_log.write(task_trace)
+    return job
+
+chat_task = None
+if st.session_state.chat_pending:
+    chat_task = get_task_pool().get(st.session_state.session_id, st.session_state.chat_pending[0])
+    if chat_task is None or chat_task.status == CANCELLED:
+        st.session_state.chat_pending = chat_task = None
+    elif chat_task.status == DONE:
+        # Finished since the last run: it becomes part of the history
+        st.session_state.messages.append({"role": "user", "content": st.session_state.chat_pending[1]})
+        st.session_state.messages.append(
+            {"role": "assistant", "content": chat_task.text, "route": chat_task.meta.get("route")})
+        st.session_state.chat_pending = chat_task = None
+busy = chat_task is not None and not chat_task.finished
 
 st.subheader("Chat with AI advisor")
 
-user_input = st.chat_input("Ask about this job...", disabled=not job_text or st.session_state.busy)
-
-if user_input:
-    if st.session_state.busy:
-        st.warning("⚠️ While jobsGPT is processing a request, please wait until it finishes.")
-        st.session_state.busy = False  # unlock
-        if st.button("Start over", type="primary"):
-            st.rerun()
+# Display chat history
+for msg in st.session_state.messages:
+    with st.chat_message("user" if msg["role"] == "user" else "assistant"):
+        st.write(msg["content"])
+        if msg.get("route"):
+            st.caption(ROUTE_LABELS[msg["route"]])
+
+user_input = st.chat_input("Ask about this job...", disabled=not job_text or busy)
+
+if user_input and not busy:
+    # Facts quoted in the posting are answered here; everything else goes to a model tier
+    chat_trace = Trace("chat", st.session_state.session_id)
+    with chat_trace.stage("route"):
+        route = route_question(user_input, job_text, fast_tier=bool(FAST_MODEL))
+    if route.path == LOCAL:
+        chat_trace.count("route", LOCAL)
+        get_trace_log().write(chat_trace)
+        st.session_state.messages.append({"role": "user", "content": user_input})
+        st.session_state.messages.append({"role": "assistant", "content": route.answer, "route": LOCAL})
+        st.chat_message("user").write(user_input)
+        with st.chat_message("assistant"):
+            st.markdown(route.answer)
+            st.caption(ROUTE_LABELS[LOCAL])
     else:
-        st.session_state.busy = True  # lock
-        try:    
-            with st.spinner("🤔 Checking..."):
-                st.session_state.messages.append({"role": "user", "content": user_input})
-                company_info = job_text
-
-                context = f"""
-                Candidate CV:
-                {cv_text}
-
-                Job Description:
-                {job_text}
-
-                Company Data:
-                {company_info}
-
-                Task:
-                - Extract probable company name from {job_text}
-                - Comment on company reputation (if the information is available).
-                - Respond to the candidate named in {cv_text} (if provided) with professional advice about {user_input}, using {job_text} for relevant reference.
-                """
-
-                #response = model.generate_content(context)
-                response = client.models.generate_content(
-                    model="gemini-2.5-flash",
-                    contents=context
-                )
-            answer = response.text
-            st.session_state.messages.append({"role": "assistant", "content": answer})
-            if answer:
-                st.session_state.busy = False  # unlock
-            # Display chat history
-            for msg in st.session_state.messages:
-                if msg["role"] == "user":
-                    st.chat_message("user").write(msg["content"])
-                else:
-                    st.chat_message("assistant").write(msg["content"])
-
-        except requests.exceptions.Timeout:
-            st.error("⏳ The request took too long and timed out. Please try again later.")
-
-        except requests.exceptions.RequestException as e:
-            st.error("⚠️ Network issue detected. Please check your connection.")
-            #st.text(f"Details: {e}")
-
-        except Exception as e:
-            st.error("❌ Something went wrong while processing your request.")
-            st.text(f"Details: {e.message[:78]}")
-
-        # finally:
-        #     st.session_state.busy = False  # unlock        
-
-        # if company_info: 
-        #     st.subheader("Company News") 
-        #     st.text(fetch_company_news(company_info)) 
-        #     st.subheader("Company Reviews (Indeed)") 
-        #     st.text(fetch_company_reviews(company_info))
-        # 
-
-    # # Display chat history
-    # for msg in st.session_state.messages:
-    #     if msg["role"] == "user":
-    #         st.chat_message("user").write(msg["content"])
-    #     else:
-    #         st.chat_message("assistant").write(msg["content"])
-
+        request_id = uuid.uuid4().hex
+        chat_task = get_task_pool().submit(
+            st.session_state.session_id, request_id,
+            run_chat(cv_text, job_text, user_input, list(st.session_state.messages),
+                     st.session_state.context_cache, st.session_state.session_id, route))
+        st.session_state.chat_pending = (request_id, user_input)
+
+if chat_task:
+    st.chat_message("user").write(st.session_state.chat_pending[1])
+    if not chat_task.finished and st.button("Start over", type="primary"):
+        get_task_pool().cancel(st.session_state.session_id, chat_task.request_id)
+        st.session_state.chat_pending = None
+        st.rerun()
+    with st.chat_message("assistant"):
+        placeholder = st.empty()
+        show_task(chat_task, placeholder, idle="🤔 Checking...")
+        if "prompt_tokens" in chat_task.meta:
+            st.caption(f"{ROUTE_LABELS[chat_task.meta['route']]} · estimated prompt size: "
+                       f"~{chat_task.meta['prompt_tokens']:,} tokens"
+                       + (" (CV and job served from context cache)" if chat_task.meta.get("cached_context") else ""))
+    if chat_task.status == FAILED:
+        show_error(chat_task.error)
+        st.session_state.chat_pending = None
+    elif chat_task.status == DONE:
+        # Rerun so the answer moves into the history and the input unlocks
+        if trace.stages:
+            get_trace_log().write(trace)
+        st.rerun()
+
+# What this session holds in memory, and the process high-water mark
+session_kb = session_bytes(upload, [cv_text, job_text], st.session_state.messages) / 1024
+st.session_state.peak_session_kb = max(st.session_state.get("peak_session_kb", 0.0), session_kb)
+trace.count("session_kb", round(st.session_state.peak_session_kb, 1))
+trace.count("peak_rss_mb", peak_rss_mb())
+
+# One structured log line per interaction that did any work
+if trace.stages:
+    get_trace_log().write(trace)
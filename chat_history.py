@@ -0,0 +1,48 @@
+import re
+
+from google.genai import types
+
+# Most recent messages sent verbatim; anything older is summarized
+HISTORY_WINDOW = 6
+# Long answers in the window are clipped to this many characters
+MAX_MESSAGE_CHARS = 2000
+SUMMARY_CHARS = 160
+
+
+def _first_sentence(text, limit=SUMMARY_CHARS):
+    text = re.sub(r"[#*_`>]+", "", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    match = re.match(r"(.+?[.!?])(\s|$)", text)
+    sentence = match.group(1) if match else text
+    if len(sentence) > limit:
+        sentence = sentence[:limit].rstrip() + "…"
+    return sentence
+
+
+def summarize_messages(messages):
+    """One line per older message, enough for follow-ups to resolve references"""
+    lines = []
+    for msg in messages:
+        who = "Candidate asked" if msg["role"] == "user" else "Advisor answered"
+        lines.append(f"- {who}: {_first_sentence(msg['content'])}")
+    return "\n".join(lines)
+
+
+def split_history(messages, window=HISTORY_WINDOW):
+    """(summary of older messages, recent messages kept verbatim)"""
+    if len(messages) <= window:
+        return "", list(messages)
+    return summarize_messages(messages[:-window]), list(messages[-window:])
+
+
+def to_contents(messages, turn_text):
+    """Gemini contents for the recent messages followed by the new turn"""
+    contents = []
+    for msg in messages:
+        role = "user" if msg["role"] == "user" else "model"
+        text = msg["content"]
+        if len(text) > MAX_MESSAGE_CHARS:
+            text = text[:MAX_MESSAGE_CHARS] + " …"
+        contents.append(types.Content(role=role, parts=[types.Part(text=text)]))
+    contents.append(types.Content(role="user", parts=[types.Part(text=turn_text)]))
+    return contents
@@ -0,0 +1,141 @@
+import re
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import quote_plus
+
+from job_clean import json_ld_items
+from job_fetch import make_session, page_text
+
+NEWS_URL = "https://news.google.com/rss/search?q={query}&hl=en-US&gl=US&ceid=US:en"
+REVIEWS_URL = "https://www.indeed.com/cmp/{slug}/reviews"
+
+CompanyIntel = namedtuple("CompanyIntel", "company news reviews rating errors")
+
+
+def company_slug(company_name):
+    return re.sub(r"[^A-Za-z0-9]+", "-", company_name).strip("-")
+
+
+def parse_news_rss(xml_text, limit=5):
+    """Headlines from a Google News RSS feed, newest first as served"""
+    import xml.etree.ElementTree as ET
+
+    root = ET.fromstring(xml_text)
+    headlines = []
+    for item in root.iter("item"):
+        title = (item.findtext("title") or "").strip()
+        source = (item.findtext("source") or "").strip()
+        published = (item.findtext("pubDate") or "").strip()
+        if not title:
+            continue
+        # Titles come as "Headline - Source"; keep the source once
+        if source and title.endswith(f" - {source}"):
+            title = title[: -len(source) - 3]
+        when = " ".join(published.split()[1:4]) if published else ""
+        details = ", ".join(part for part in (source, when) if part)
+        headlines.append(f"{title} ({details})" if details else title)
+        if len(headlines) >= limit:
+            break
+    return headlines
+
+
+def parse_reviews(html, limit=3, max_chars=200):
+    """(review snippets, overall rating) from a company reviews page"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    reviews = []
+    rating = None
+    for item in json_ld_items(soup):
+        aggregate = item.get("aggregateRating")
+        if isinstance(aggregate, dict) and aggregate.get("ratingValue"):
+            rating = str(aggregate["ratingValue"])
+        found = [item] if item.get("@type") == "Review" else item.get("review") or []
+        for review in found if isinstance(found, list) else [found]:
+            body = review.get("reviewBody") if isinstance(review, dict) else None
+            if body:
+                reviews.append(body)
+    if not reviews:
+        # Microdata / test-id markup used when there is no JSON-LD
+        for node in soup.select('[itemprop="reviewBody"], [data-testid*="review-text"], [data-tn-component="reviewDescription"]'):
+            text = node.get_text(" ", strip=True)
+            if text:
+                reviews.append(text)
+    snippets = []
+    for text in reviews[:limit]:
+        text = re.sub(r"\s+", " ", text).strip()
+        snippets.append(text if len(text) <= max_chars else text[:max_chars].rstrip() + "…")
+    return snippets, rating
+
+
+class CompanyIntelService:
+    """News and reviews for a company, fetched concurrently under one deadline.
+
+    Results are cached per company for a TTL. A source that misses the
+    deadline is reported as an error instead of holding up the other one.
+    """
+
+    def __init__(self, session=None, ttl=3600, deadline=6.0, max_workers=8):
+        self.session = session or make_session()
+        self.ttl = ttl
+        self.deadline = deadline
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="company-intel")
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _fetch_news(self, company):
+        response = self.session.get(NEWS_URL.format(query=quote_plus(f'"{company}"')), timeout=self.deadline)
+        response.raise_for_status()
+        return parse_news_rss(response.content)
+
+    def _fetch_reviews(self, company):
+        response = self.session.get(REVIEWS_URL.format(slug=company_slug(company)), timeout=self.deadline)
+        response.raise_for_status()
+        return parse_reviews(page_text(response))
+
+    def get(self, company):
+        key = company.strip().lower()
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached and time.monotonic() < cached[0]:
+            return cached[1]
+
+        news_future = self._executor.submit(self._fetch_news, company)
+        reviews_future = self._executor.submit(self._fetch_reviews, company)
+        wait([news_future, reviews_future], timeout=self.deadline)
+
+        errors = []
+        news, reviews, rating = [], [], None
+        for name, future in (("news", news_future), ("reviews", reviews_future)):
+            if not future.done():
+                future.cancel()
+                errors.append(f"{name}: timed out")
+            elif future.exception() is not None:
+                errors.append(f"{name}: {future.exception()}")
+            elif name == "news":
+                news = future.result()
+            else:
+                reviews, rating = future.result()
+
+        intel = CompanyIntel(company, news, reviews, rating, errors)
+        # Partial results are cached for a shorter time so a slow source gets retried
+        ttl = self.ttl if not errors else min(self.ttl, 300)
+        with self._lock:
+            self._cache[key] = (time.monotonic() + ttl, intel)
+        return intel
+
+
+def summarize_intel(intel, max_news=3, max_reviews=2):
+    """Compact text for the prompt; empty when nothing useful was found"""
+    lines = []
+    if intel.rating:
+        lines.append(f"Employee rating: {intel.rating}/5")
+    for headline in intel.news[:max_news]:
+        lines.append(f"News: {headline}")
+    for review in intel.reviews[:max_reviews]:
+        lines.append(f"Employee review: {review}")
+    if not lines:
+        return ""
+    return f"{intel.company}\n" + "\n".join(lines)
@@ -0,0 +1,91 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from cv_extract import EXTRACTOR_VERSION, extract_cv_text
+
+
+def cv_cache_key(data):
+    """SHA-256 of the uploaded bytes, salted with the extractor version"""
+    digest = hashlib.sha256(f"v{EXTRACTOR_VERSION}:".encode())
+    digest.update(data)
+    return digest.hexdigest()
+
+
+class CVTextCache:
+    """Extracted CV text keyed on upload content.
+
+    An in-process LRU bounded by total characters sits in front of an
+    optional directory of text files, so a CV is parsed once per upload
+    and every later rerun (or process restart) gets the text back.
+    """
+
+    def __init__(self, max_chars=8_000_000, disk_dir=None):
+        self.max_chars = max_chars
+        self.disk_dir = disk_dir
+        self._entries = OrderedDict()
+        self._chars = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.txt")
+
+    def _remember(self, key, text):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._chars -= len(old)
+            if len(text) > self.max_chars:
+                return
+            self._entries[key] = text
+            self._chars += len(text)
+            while self._chars > self.max_chars:
+                _, evicted = self._entries.popitem(last=False)
+                self._chars -= len(evicted)
+
+    def get(self, key):
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return text
+
+        if self.disk_dir:
+            try:
+                with open(self._disk_path(key), encoding="utf-8") as f:
+                    text = f.read()
+            except FileNotFoundError:
+                text = None
+            if text is not None:
+                self._remember(key, text)
+                self.hits += 1
+                return text
+
+        self.misses += 1
+        return None
+
+    def put(self, key, text):
+        self._remember(key, text)
+        if self.disk_dir:
+            # Write-then-rename so a concurrent reader never sees half a file
+            fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, self._disk_path(key))
+
+    def lookup(self, filename, data, on_progress=None):
+        """(text, was_cached) for these bytes, extracting the text on a miss"""
+        key = cv_cache_key(data)
+        text = self.get(key)
+        if text is not None:
+            return text, True
+        text = extract_cv_text(filename, data, on_progress)
+        self.put(key, text)
+        return text, False
@@ -0,0 +1,340 @@
+import io
+import mmap
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Parsers are imported inside the extractors, so a process only pays for the
+# libraries of the file types it actually sees.
+
+# Bump whenever the text produced for a given file changes, so cached
+# extractions from an older version are not served any more.
+EXTRACTOR_VERSION = "3"
+
+
+# PDFs shorter than this are cheaper to parse inline than to ship to workers
+PARALLEL_MIN_PAGES = 6
+PAGES_PER_TASK = 2
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn rather than fork: the Streamlit server is multi-threaded
+            _pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 2,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+class _BufferReader(io.RawIOBase):
+    """Seekable file over a memoryview; each read copies only what it asks for"""
+
+    def __init__(self, data):
+        self._view = memoryview(data).cast("B")
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._view)}[whence]
+        self._pos = max(base + offset, 0)
+        return self._pos
+
+    def readinto(self, buffer):
+        chunk = self._view[self._pos:self._pos + len(buffer)]
+        buffer[:len(chunk)] = chunk
+        self._pos += len(chunk)
+        return len(chunk)
+
+
+def open_buffer(data):
+    """A file object over uploaded bytes without copying them.
+
+    BytesIO shares a bytes object's memory until written to, but copies any
+    other buffer, so views (e.g. from UploadedFile.getbuffer()) get a reader.
+    """
+    if isinstance(data, bytes):
+        return io.BytesIO(data)
+    return _BufferReader(data)
+
+
+# Two-column layouts: a gutter must be this wide (points) and leave at least
+# this share of the body text on each side
+MIN_GUTTER = 12
+MIN_COLUMN_SHARE = 0.05
+# Name and contact banners often run across both columns
+BANNER_SHARE = 0.15
+
+
+def _column_gutter(page):
+    """x of an empty vertical strip splitting the page body in two, or None"""
+    top = page.height * BANNER_SHARE
+    chars = [c for c in page.chars if c["top"] > top and c["text"].strip()]
+    if len(chars) < 100:
+        return None
+    step = 4
+    used = [False] * (int(page.width) // step + 2)
+    for c in chars:
+        for b in range(int(c["x0"]) // step, int(c["x1"]) // step + 1):
+            used[b] = True
+    best = None
+    run = None
+    # Only look for a gutter in the middle three fifths of the page
+    for b in range(len(used) // 5, len(used) * 4 // 5 + 1):
+        if not used[b]:
+            run = b if run is None else run
+            continue
+        if run is not None and (b - run) * step >= MIN_GUTTER and (best is None or b - run > best[1] - best[0]):
+            best = (run, b)
+        run = None
+    if best is None:
+        return None
+    x = (best[0] + best[1]) * step / 2
+    left = sum(1 for c in chars if c["x1"] <= x)
+    if min(left, len(chars) - left) < MIN_COLUMN_SHARE * len(chars):
+        return None
+    return x
+
+
+def _page_text(page):
+    """Page text, reading a two-column body one column at a time"""
+    gutter = _column_gutter(page)
+    if gutter is None:
+        return page.extract_text() or ""
+    top = page.height * BANNER_SHARE
+    regions = [(0, 0, page.width, top), (0, top, gutter, page.height), (gutter, top, page.width, page.height)]
+    return "\n".join(filter(None, (page.crop(box).extract_text() for box in regions)))
+
+
+def _extract_page_range(path, start, stop):
+    import pdfplumber
+
+    # Runs in a worker process. The PDF is mapped from the spill file rather
+    # than pickled into every task, so all workers share one copy in the
+    # page cache.
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        with pdfplumber.open(mapped) as pdf:
+            return [_page_text(pdf.pages[i]) for i in range(start, stop)]
+
+
+def _spill(data):
+    """Write the PDF to a temp file once, for the workers to map"""
+    with tempfile.NamedTemporaryFile(prefix="cv-", suffix=".pdf", delete=False) as spill:
+        spill.write(data)
+    return spill.name
+
+
+def iter_pdf_pages(data):
+    """Yield (page_number, page_count, text) for each page, in page order.
+
+    Long PDFs are split into small page ranges that run across a process
+    pool; pages are yielded as soon as they and every earlier page are done.
+    """
+    import pdfplumber
+
+    with pdfplumber.open(open_buffer(data)) as pdf:
+        page_count = len(pdf.pages)
+        if page_count < PARALLEL_MIN_PAGES or (os.cpu_count() or 1) < 2:
+            for i, page in enumerate(pdf.pages):
+                yield i + 1, page_count, _page_text(page)
+            return
+
+    path = _spill(data)
+    try:
+        pool = _get_pool()
+        futures = [
+            pool.submit(_extract_page_range, path, start, min(start + PAGES_PER_TASK, page_count))
+            for start in range(0, page_count, PAGES_PER_TASK)
+        ]
+    except BrokenProcessPool:
+        os.unlink(path)
+        _reset_pool()
+        yield from _extract_serially(data, page_count)
+        return
+
+    page_number = 0
+    try:
+        for future in futures:
+            for text in future.result():
+                page_number += 1
+                yield page_number, page_count, text
+    except BrokenProcessPool:
+        _reset_pool()
+        yield from _extract_serially(data, page_count, skip=page_number)
+    finally:
+        for future in futures:
+            future.cancel()
+        # Workers still reading keep their mapping; the name can go now
+        os.unlink(path)
+
+
+def _extract_serially(data, page_count, skip=0):
+    import pdfplumber
+
+    with pdfplumber.open(open_buffer(data)) as pdf:
+        for i in range(skip, page_count):
+            yield i + 1, page_count, _page_text(pdf.pages[i])
+
+
+def extract_pdf(data, on_progress=None):
+    """Extract the text of every page of a PDF.
+
+    on_progress(text_so_far, pages_done, page_count) is called after each page.
+    """
+    cv_text = ""
+    for page_number, page_count, text in iter_pdf_pages(data):
+        if text:
+            cv_text += text + "\n"
+        if on_progress:
+            on_progress(cv_text, page_number, page_count)
+    return cv_text
+
+
+# Section labels, matched against lowercased tag names without namespace.
+# Covers plain exports as well as HR-XML and Europass element names.
+XML_SECTIONS = [
+    ("Contact", ("contact", "identification", "address", "email", "phone")),
+    ("Summary", ("summary", "objective", "headline")),
+    ("Experience", ("employment", "experience", "workhistory", "position")),
+    ("Education", ("education", "school", "degree", "training")),
+    ("Skills", ("skill", "competenc", "qualification", "language", "certification")),
+]
+# Short entries read better on one comma-separated line
+INLINE_SECTIONS = {"Skills"}
+
+
+def _local_name(tag):
+    return tag.rsplit("}", 1)[-1].lower() if isinstance(tag, str) else ""
+
+
+def _xml_section(name):
+    for label, keywords in XML_SECTIONS:
+        if any(keyword in name for keyword in keywords):
+            return label
+    return None
+
+
+def _render_sections(header, sections):
+    lines = list(header)
+    for label, _ in XML_SECTIONS:
+        entries = sections.get(label)
+        if not entries:
+            continue
+        lines.append(f"## {label}")
+        if label in INLINE_SECTIONS:
+            lines.append(", ".join(entries))
+        else:
+            lines.extend(f"- {entry}" for entry in entries)
+    return "\n".join(lines)
+
+
+def extract_xml(data):
+    """Labelled sections of an XML CV, parsed incrementally.
+
+    Elements are detached and cleared as soon as they close, so memory
+    stays flat however large the export is. The outermost element whose
+    name looks like a section (experience, education, ...) starts that
+    section; each of its children becomes one entry.
+    """
+    import xml.etree.ElementTree as ET
+
+    header = []
+    sections = {}
+    stack = []
+    section = None
+    section_depth = 0
+    fields = []
+
+    for event, elem in ET.iterparse(open_buffer(data), events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            if section is None and len(stack) > 1:
+                section = _xml_section(_local_name(elem.tag))
+                section_depth = len(stack)
+            continue
+
+        depth = len(stack)
+        stack.pop()
+        text = " ".join((elem.text or elem.get("name") or "").split())
+        if text:
+            (fields if section else header).append(text)
+        if section and depth <= section_depth + 1 and fields:
+            # An entry (or loose text directly in the section) is complete
+            sections.setdefault(section, []).append("; ".join(fields))
+            fields = []
+        if section and depth == section_depth:
+            section = None
+        elem.clear()
+        if stack:
+            stack[-1].remove(elem)
+
+    return _render_sections(header, sections)
+
+
+def _docx_table_lines(table):
+    lines = []
+    for row in table.rows:
+        # Merged cells are returned once per grid column they span
+        cells = list(dict.fromkeys(cell.text.strip() for cell in row.cells))
+        line = " | ".join(cell for cell in cells if cell)
+        if line:
+            lines.append(line)
+    return lines
+
+
+def extract_docx(data):
+    """Paragraphs and tables of a Word CV, in document order"""
+    from docx import Document
+    from docx.table import Table
+
+    doc = Document(open_buffer(data))
+    lines = []
+    for block in doc.iter_inner_content():
+        if isinstance(block, Table):
+            lines.extend(_docx_table_lines(block))
+        elif block.style is not None and block.style.name.startswith("List"):
+            lines.append(f"- {block.text}")
+        else:
+            lines.append(block.text)
+    return "\n".join(lines)
+
+
+EXTRACTORS = {
+    ".pdf": extract_pdf,
+    ".xml": extract_xml,
+    ".docx": extract_docx,
+}
+
+
+def extract_cv_text(filename, data, on_progress=None):
+    """Pick the extractor from the file extension and return the CV text"""
+    for ext, extractor in EXTRACTORS.items():
+        if filename.lower().endswith(ext):
+            if extractor is extract_pdf:
+                return extract_pdf(data, on_progress)
+            return extractor(data)
+    raise ValueError(f"Unsupported CV format: {filename}")
@@ -0,0 +1,156 @@
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+from tokens import estimate_tokens
+
+# Every field but name and summary is a tuple of lines, so parsed CVs can be
+# shared between reruns without being mutated.
+CV = namedtuple("CV", "name contact summary roles skills education other raw_text")
+
+# Section headings as CVs write them; matched against the whole line
+HEADINGS = [
+    ("contact", r"contact( details| information)?|personal (details|information)"),
+    ("summary", r"((professional|career|personal) )?(summary|profile|objective)|about( me)?"),
+    ("experience", r"((work|professional|employment|relevant) )?experience|employment( history)?|(work|career) history"),
+    ("education", r"education( (and|&) training)?|academic (background|qualifications)|qualifications"),
+    ("skills", r"((technical|key|core) )?(skills|competencies|competences)|technologies|languages|certifications?"),
+    ("other", r"other|projects|publications|awards|interests|hobbies|volunteering|references"),
+]
+_HEADING = [(name, re.compile(pattern)) for name, pattern in HEADINGS]
+BULLET = re.compile(r"^\s*[-•*▪●◦‣–]\s+")
+SKILL_SEPARATORS = re.compile(r"\s*[,;|•·]\s*")
+
+# Question type -> sections to include, most relevant first
+FOCUS = {
+    "analysis": ("contact", "summary", "experience", "skills", "education", "other"),
+    "general": ("summary", "experience", "skills", "education", "contact"),
+    "skills": ("skills", "summary", "experience", "other"),
+    "experience": ("experience", "summary", "skills", "other"),
+    "education": ("education", "skills", "summary"),
+}
+DIGEST_BUDGETS = {"analysis": 2500, "general": 2000, "skills": 1200, "experience": 2000, "education": 800}
+QUESTION_TYPES = [
+    ("education", re.compile(r"degree|educat|universit|college|qualification|stud(y|ied)|course", re.I)),
+    ("skills", re.compile(r"skill|technolog|tools?\b|stack|certif|strength|gaps?\b|missing|lack", re.I)),
+    ("experience", re.compile(r"experience|career|project|achievement|responsib|previous|employer|years", re.I)),
+]
+# Most recent roles are kept whole longest; older ones shrink to their heading
+ROLES_IN_FULL = 3
+
+
+def _heading(line):
+    words = line.strip().lstrip("#").strip().rstrip(":").strip().lower()
+    if not words or len(words) > 40:
+        return None
+    for name, pattern in _HEADING:
+        if pattern.fullmatch(words):
+            return name
+    return None
+
+
+def _split_roles(lines):
+    """Group experience lines into roles: a heading line plus its bullets"""
+    if all(BULLET.match(line) for line in lines):
+        # One role per line, as extract_xml writes them
+        return [BULLET.sub("", line) for line in lines]
+    roles = []
+    current = []
+    previous_bullet = False
+    for line in lines:
+        bullet = bool(BULLET.match(line))
+        if current and previous_bullet and not bullet and not line[:1].islower():
+            roles.append("\n".join(current))
+            current = []
+        current.append(line)
+        previous_bullet = bullet
+    if current:
+        roles.append("\n".join(current))
+    return roles
+
+
+def _split_skills(lines):
+    skills = []
+    for line in lines:
+        skills.extend(s for s in SKILL_SEPARATORS.split(BULLET.sub("", line)) if s)
+    return list(dict.fromkeys(skills))
+
+
+@lru_cache(maxsize=32)
+def parse_cv(text):
+    """Split extracted CV text into contact, summary, roles, skills and education"""
+    sections = {"preamble": []}
+    current = "preamble"
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        heading = _heading(line)
+        if heading:
+            current = heading
+            sections.setdefault(current, [])
+            continue
+        label, _, rest = line.partition(" | ")
+        if rest and _heading(label):
+            # A table row labelled in its first cell, e.g. "Skills | Python, SQL"
+            current, line = _heading(label), rest
+        sections.setdefault(current, []).append(line)
+
+    preamble = sections["preamble"]
+    name = ""
+    if preamble and len(preamble[0].split()) <= 5 and not re.search(r"[@\d]", preamble[0]):
+        name, preamble = preamble[0], preamble[1:]
+    return CV(
+        name=name,
+        contact=tuple(BULLET.sub("", line) for line in preamble + sections.get("contact", [])),
+        summary=" ".join(sections.get("summary", [])),
+        roles=tuple(_split_roles(sections.get("experience", []))),
+        skills=tuple(_split_skills(sections.get("skills", []))),
+        education=tuple(BULLET.sub("", line) for line in sections.get("education", [])),
+        other=tuple(sections.get("other", [])),
+        raw_text=text,
+    )
+
+
+def question_type(question):
+    """Which part of the CV a chat question is mostly about"""
+    for kind, pattern in QUESTION_TYPES:
+        if pattern.search(question):
+            return kind
+    return "general"
+
+
+def _render(cv, sections, roles_in_full):
+    lines = [cv.name] if cv.name else []
+    for section in sections:
+        if section == "contact" and cv.contact:
+            lines.extend(cv.contact)
+        elif section == "summary" and cv.summary:
+            lines += ["## Summary", cv.summary]
+        elif section == "experience" and cv.roles:
+            lines.append("## Experience")
+            for i, role in enumerate(cv.roles):
+                lines.append(role if i < roles_in_full else role.splitlines()[0].split("; ")[0])
+        elif section == "skills" and cv.skills:
+            lines += ["## Skills", ", ".join(cv.skills)]
+        elif section == "education" and cv.education:
+            lines += ["## Education", *cv.education]
+        elif section == "other" and cv.other:
+            lines += ["## Other", *cv.other]
+    return "\n".join(lines)
+
+
+def cv_digest(cv, kind="analysis", budget=None):
+    """The parts of a CV that matter for kind, shrunk towards budget tokens.
+
+    Older roles are cut to their heading first. CVs with no recognisable
+    sections are returned whole; the prompt budget still applies to them.
+    """
+    if not (cv.roles or cv.skills or cv.education):
+        return cv.raw_text
+    budget = budget or DIGEST_BUDGETS[kind]
+    for roles_in_full in (len(cv.roles), ROLES_IN_FULL, 1, 0):
+        text = _render(cv, FOCUS[kind], roles_in_full)
+        if estimate_tokens(text) <= budget:
+            break
+    return text
@@ -0,0 +1,137 @@
+import json
+from collections import namedtuple
+
+from google.genai import types
+
+# Field name, label shown in the app, schema. The order is the order Gemini
+# writes them in: the score comes after the reasoning it is based on.
+FIELDS = [
+    ("company", "Company", types.Schema(type=types.Type.STRING, description="Probable company name from the job description")),
+    ("reputation", "Company reputation", types.Schema(type=types.Type.STRING, description="Company reputation, if the information is available")),
+    ("strengths", "Key strengths", types.Schema(type=types.Type.ARRAY, items=types.Schema(type=types.Type.STRING),
+                                                description="Candidate skills and experience that match the job")),
+    ("gaps", "Gaps", types.Schema(type=types.Type.ARRAY, items=types.Schema(type=types.Type.STRING),
+                                  description="Missing qualifications")),
+    ("cultural_fit", "Cultural fit", types.Schema(type=types.Type.STRING, description="Fit with the company's values")),
+    ("probability", "Probability of fit", types.Schema(type=types.Type.STRING, enum=["low", "medium", "high"])),
+    ("advice", "Advice", types.Schema(type=types.Type.ARRAY, items=types.Schema(type=types.Type.STRING),
+                                      description="How to improve the chances")),
+    ("score", "Fit score", types.Schema(type=types.Type.INTEGER, minimum=0, maximum=100)),
+    ("explanation", "Why this score", types.Schema(type=types.Type.STRING, description="Explanation of the fit score")),
+]
+FIT_SCHEMA = types.Schema(
+    type=types.Type.OBJECT,
+    properties={name: schema for name, _, schema in FIELDS},
+    required=[name for name, _, _ in FIELDS],
+    property_ordering=[name for name, _, _ in FIELDS],
+)
+
+# One analysis, small enough to keep thousands of them in SQLite or memory
+FitResult = namedtuple("FitResult", [name for name, _, _ in FIELDS])
+
+
+def fit_config():
+    """Generation config asking Gemini for a FIT_SCHEMA object instead of markdown"""
+    return types.GenerateContentConfig(response_mime_type="application/json", response_schema=FIT_SCHEMA)
+
+
+class FieldStream:
+    """Top-level fields of a JSON object that arrives in chunks.
+
+    feed() scans each new character once and returns the fields whose values
+    completed in that chunk, so they can be shown before the object closes.
+    """
+
+    def __init__(self):
+        self.fields = {}
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._key = None
+        self._start = None
+
+    def feed(self, piece):
+        self._buffer += piece
+        done = []
+        buffer = self._buffer
+        for pos in range(self._pos, len(buffer)):
+            char = buffer[pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1 and self._key is None and self._start is None:
+                    self._start = pos
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]" or char == ",":
+                if self._depth == 1 and self._key is not None:
+                    value = self._decode(buffer[self._start:pos])
+                    if value is not None:
+                        self.fields[self._key] = value[0]
+                        done.append((self._key, value[0]))
+                    self._key = self._start = None
+                if char != ",":
+                    self._depth -= 1
+            elif char == ":" and self._depth == 1 and self._key is None and self._start is not None:
+                key = self._decode(buffer[self._start:pos])
+                self._key = key[0] if key else ""
+                self._start = pos + 1
+        self._pos = len(buffer)
+        return done
+
+    @staticmethod
+    def _decode(text):
+        try:
+            return (json.loads(text),)
+        except ValueError:
+            return None
+
+
+def to_result(fields):
+    """A FitResult from parsed fields, with missing ones empty and the score an int"""
+    values = {name: fields.get(name) for name in FitResult._fields}
+    for name in ("strengths", "gaps", "advice"):
+        values[name] = tuple(values[name] or ())
+    try:
+        values["score"] = max(0, min(100, int(values["score"])))
+    except (TypeError, ValueError):
+        values["score"] = None
+    return FitResult(**values)
+
+
+def parse_fit(text):
+    """The FitResult in a complete JSON response; ValueError if there is none"""
+    fields = json.loads(text)
+    if not isinstance(fields, dict):
+        raise ValueError("expected a JSON object")
+    return to_result(fields)
+
+
+def to_json(result):
+    """Compact JSON for a FitResult, as stored in the caches"""
+    return json.dumps(result._asdict(), ensure_ascii=False, separators=(",", ":"))
+
+
+def fit_markdown(fields):
+    """Markdown for the fields parsed so far, in schema order"""
+    lines = []
+    for name, label, _ in FIELDS:
+        value = fields.get(name)
+        if value in (None, "", [], ()):
+            continue
+        if name == "score":
+            lines.append(f"**{label}: {value}/100**")
+        elif isinstance(value, (list, tuple)):
+            lines.append(f"**{label}**\n" + "\n".join(f"- {item}" for item in value))
+        else:
+            lines.append(f"**{label}:** {value}")
+    return "\n\n".join(lines)
@@ -0,0 +1,184 @@
+import hashlib
+import threading
+import time
+
+import httpx
+from google.genai import errors, types
+
+from prompts import PROMPT_VERSION, build_chat_context
+from retries import is_retryable
+
+# Explicit caches below this size are rejected by the API
+MIN_CACHE_TOKENS = 1024
+# Anything the cache calls can raise; every one of them means "send the context inline"
+CACHE_ERRORS = (errors.APIError, httpx.TransportError)
+SYSTEM_INSTRUCTION = (
+    "You are a job application advisor. The candidate's CV and the job "
+    "description are provided; answer each question using them."
+)
+
+
+def context_key(cv_text, job_text, model):
+    digest = hashlib.sha256()
+    for part in (cv_text, job_text, model, PROMPT_VERSION):
+        digest.update(hashlib.sha256(part.encode("utf-8")).digest())
+    return digest.hexdigest()
+
+
+class ChatContextCache:
+    """One server-side cached context for the current (CV, job) pair.
+
+    Each chat turn then sends only the question and references the cache by
+    name. The cache is replaced when the CV or job changes, its TTL is
+    extended while the conversation is active, and the chat falls back to
+    inline context if caching is unavailable. With a scheduler, cache calls
+    count against the quota and get one quick retry.
+
+    The script thread (release_if_stale, invalidate) and the chat worker
+    (name_for) share one instance. A name handed out by name_for stays alive
+    until the turn calls done(name): a replaced cache is deleted only once no
+    turn references it. API calls are made outside the lock.
+    """
+
+    def __init__(self, client, model, ttl=900, refresh_margin=120, min_tokens=MIN_CACHE_TOKENS,
+                 scheduler=None, session_id=None):
+        self.client = client
+        self.model = model
+        self.scheduler = scheduler
+        self.session_id = session_id
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self.min_tokens = min_tokens
+        self.key = None
+        self.name = None
+        self.expires_at = 0.0
+        # Keys the API refused to cache, so we don't retry on every turn
+        self._uncacheable = set()
+        self._lock = threading.Lock()
+        self._in_use = {}  # name -> turns referencing it
+        self._retired = set()  # replaced names, deleted once no turn uses them
+
+    def _call(self, fn):
+        if self.scheduler is None:
+            return fn()
+        # Inline context is always there as a fallback, so don't wait long
+        return self.scheduler.call(self.session_id, fn, attempts=2, base_delay=0.5, max_delay=2.0)
+
+    def _create(self, key, cv_text, job_text):
+        """Name of a new cache for this pair, or None"""
+        context = build_chat_context(cv_text, job_text)
+        if context.tokens < self.min_tokens:
+            with self._lock:
+                self._uncacheable.add(key)
+            return None
+        try:
+            cache = self._call(lambda: self.client.caches.create(
+                model=self.model,
+                config=types.CreateCachedContentConfig(
+                    display_name=f"jobsgpt-{key[:16]}",
+                    system_instruction=SYSTEM_INSTRUCTION,
+                    contents=[types.Content(role="user", parts=[types.Part(text=context.text)])],
+                    ttl=f"{self.ttl}s",
+                ),
+            ))
+        except CACHE_ERRORS as exc:
+            if not is_retryable(exc):
+                # Refused outright (model or content not cacheable): don't ask again
+                with self._lock:
+                    self._uncacheable.add(key)
+            return None
+        return cache.name
+
+    def _extend(self, name, expires_at):
+        """New expiry time for name, or None if it is gone"""
+        try:
+            self._call(lambda: self.client.caches.update(
+                name=name,
+                config=types.UpdateCachedContentConfig(ttl=f"{self.ttl}s"),
+            ))
+        except CACHE_ERRORS as exc:
+            if is_retryable(exc) and time.monotonic() < expires_at:
+                # Still alive; extend it on a later turn
+                return expires_at
+            # Expired or deleted server-side; the caller will recreate it
+            return None
+        return time.monotonic() + self.ttl
+
+    def _retire(self):
+        """Detach the current cache; names now safe to delete. Call under the lock."""
+        if self.name:
+            self._retired.add(self.name)
+        self.key = self.name = None
+        self.expires_at = 0.0
+        unused = [name for name in self._retired if not self._in_use.get(name)]
+        self._retired.difference_update(unused)
+        return unused
+
+    def _delete(self, names):
+        for name in names:
+            try:
+                self.client.caches.delete(name=name)
+            except CACHE_ERRORS:
+                pass  # it expires on its own
+
+    def invalidate(self):
+        """Drop the current cache, e.g. when the CV or job link changes"""
+        with self._lock:
+            unused = self._retire()
+        self._delete(unused)
+
+    def release_if_stale(self, cv_text, job_text):
+        """Drop the cache as soon as the CV or job no longer match it"""
+        with self._lock:
+            stale = self.key and self.key != context_key(cv_text, job_text, self.model)
+            unused = self._retire() if stale else []
+        self._delete(unused)
+
+    def name_for(self, cv_text, job_text):
+        """Cache name to reference for this pair, or None to send it inline.
+
+        Pass a returned name to done() when the turn that uses it has finished.
+        """
+        key = context_key(cv_text, job_text, self.model)
+        with self._lock:
+            if key in self._uncacheable:
+                return None
+            unused = [] if self.key == key else self._retire()
+            name, expires_at = self.name, self.expires_at
+            if name:
+                # Reserved before the lock is let go, so nobody deletes it under us
+                self._in_use[name] = self._in_use.get(name, 0) + 1
+                if time.monotonic() <= expires_at - self.refresh_margin:
+                    return name
+        self._delete(unused)
+
+        if name:
+            expires_at = self._extend(name, expires_at)
+            if expires_at is not None:
+                with self._lock:
+                    if self.name == name:
+                        self.expires_at = expires_at
+                return name
+            self.done(name)
+        name = self._create(key, cv_text, job_text)
+        if name is None:
+            return None
+        with self._lock:
+            unused = self._retire()
+            self.key, self.name = key, name
+            self.expires_at = time.monotonic() + self.ttl
+            self._in_use[name] = 1
+        self._delete(unused)
+        return name
+
+    def done(self, name):
+        """The turn referencing name has finished; a replaced cache can now go"""
+        if not name:
+            return
+        with self._lock:
+            count = self._in_use.pop(name, 0) - 1
+            if count > 0:
+                self._in_use[name] = count
+            unused = [] if count > 0 or name not in self._retired else [name]
+            self._retired.difference_update(unused)
+        self._delete(unused)
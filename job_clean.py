@@ -0,0 +1,171 @@
+import json
+import re
+from collections import namedtuple
+
+from tokens import estimate_tokens
+
+# Elements that never hold the job description itself
+NOISE_TAGS = [
+    "script", "style", "noscript", "template", "svg", "iframe", "canvas",
+    "nav", "aside", "form", "button", "select", "input",
+]
+# Page-level chrome, but kept when nested in the posting (e.g. the job title)
+CHROME_TAGS = ["header", "footer"]
+# Whole class/id words used by cookie banners, menus and share widgets;
+# "job-details-modal" is noise by this test, "shareable" is not
+NOISE_MARKERS = re.compile(
+    r"cookies?|consent|gdpr|banner|navbar|menu|breadcrumbs?|footer|sidebar|share|social|newsletter|popup|modal",
+    re.I,
+)
+MARKER_SEPARATORS = re.compile(r"[-_\s]+")
+# A "noise" element holding more than this share of the page's text is the posting
+MAX_NOISE_SHARE = 0.5
+# Less cleaned text than this is a login wall or script-only page, not a posting
+MIN_POSTING_CHARS = 200
+BLOCK_TAGS = ["article", "main", "section", "div", "td", "ul", "ol"]
+
+CleanResult = namedtuple("CleanResult", "text raw_tokens clean_tokens company")
+
+
+class EmptyPosting(ValueError):
+    """The page had (almost) no text once cleaned"""
+
+# og:site_name on these is the board, not the employer
+JOB_BOARDS = {"linkedin", "indeed", "glassdoor", "greenhouse", "lever", "workday", "monster", "ziprecruiter"}
+# "Senior Engineer at Acme Corp | LinkedIn", "Acme Corp - Senior Engineer"
+TITLE_AT_COMPANY = re.compile(r"\bat\s+([A-Z][\w&.,' -]{1,60}?)(?:\s*[|\-–—:(]|$)")
+
+
+def _is_noise(tag):
+    if tag.attrs is None:
+        return False
+    if tag.name in ("body", "html", "main", "article"):
+        return False
+    if tag.get("role") in ("navigation", "banner", "contentinfo", "dialog"):
+        return True
+    marker = " ".join(tag.get("class") or []) + " " + (tag.get("id") or "")
+    return any(NOISE_MARKERS.fullmatch(word) for word in MARKER_SEPARATORS.split(marker) if word)
+
+
+def _text_len(tag):
+    return sum(len(s.strip()) for s in tag.find_all(string=True))
+
+
+def _block_stats(root):
+    """(text length, link text length, descendant tag count) for every tag.
+
+    Computed in one bottom-up pass so scoring stays linear in page size.
+    """
+    stats = {}
+    for tag in reversed([root] + root.find_all(True)):
+        text_len = sum(len(s.strip()) for s in tag.find_all(string=True, recursive=False))
+        link_len = 0
+        tag_count = 0
+        for child in tag.find_all(True, recursive=False):
+            child_text, child_links, child_tags = stats[id(child)]
+            text_len += child_text
+            link_len += child_links
+            tag_count += child_tags + 1
+        if tag.name == "a":
+            link_len = text_len
+        stats[id(tag)] = (text_len, link_len, tag_count)
+    return stats
+
+
+def _block_score(text_len, link_len, tag_count):
+    # Text density: plenty of text, few tags, and not mostly link text
+    if text_len < 200:
+        return 0
+    return (text_len - link_len) / ((tag_count + 1) ** 0.25)
+
+
+def collapse_whitespace(text):
+    lines = (re.sub(r"[ \t ]+", " ", line).strip() for line in text.splitlines())
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def json_ld_items(soup):
+    """Every JSON-LD object on the page, including those inside an @graph"""
+    for script in soup.find_all("script", type="application/ld+json"):
+        try:
+            data = json.loads(script.string or "")
+        except ValueError:
+            continue
+        if isinstance(data, dict):
+            data = data.get("@graph", [data])
+        for item in data if isinstance(data, list) else []:
+            if isinstance(item, dict):
+                yield item
+
+
+def _json_ld_company(soup):
+    for item in json_ld_items(soup):
+        org = item.get("hiringOrganization")
+        if isinstance(org, dict) and org.get("name"):
+            return org["name"]
+        if isinstance(org, str) and org:
+            return org
+    return None
+
+
+def guess_company_name(soup):
+    """Best guess at the hiring company from structured data, meta tags or title"""
+    company = _json_ld_company(soup)
+    if company:
+        return company.strip()
+    title = soup.title.get_text(" ", strip=True) if soup.title else ""
+    match = TITLE_AT_COMPANY.search(title)
+    if match:
+        return match.group(1).strip(" .,")
+    site = soup.find("meta", property="og:site_name")
+    if site and site.get("content") and site["content"].strip().lower() not in JOB_BOARDS:
+        return site["content"].strip()
+    return None
+
+
+def extract_main_text(html):
+    """Strip page boilerplate and return the text of the densest content block.
+
+    Raises EmptyPosting when next to no text is left.
+    """
+    # Deferred so the app starts without loading bs4 until a job link is entered
+    from bs4 import BeautifulSoup, Comment
+
+    soup = BeautifulSoup(html, "html.parser")
+    raw_text = soup.get_text(separator="\n")
+    # Read before the scripts holding JSON-LD are stripped
+    company = guess_company_name(soup)
+
+    for node in soup.find_all(string=lambda s: isinstance(s, Comment)):
+        node.extract()
+    for tag in soup.find_all(NOISE_TAGS):
+        tag.decompose()
+    for tag in soup.find_all(CHROME_TAGS):
+        if not tag.find_parent(["article", "main"]):
+            tag.decompose()
+    body = soup.body or soup
+    # Marked as noise but holding most of the text: a posting shown in a modal, say
+    max_noise = MAX_NOISE_SHARE * _text_len(body)
+    for tag in soup.find_all(_is_noise):
+        if not tag.decomposed and _text_len(tag) <= max_noise:
+            tag.decompose()
+
+    stats = _block_stats(body)
+    best, best_score = body, _block_score(*stats[id(body)])
+    for tag in body.find_all(BLOCK_TAGS):
+        score = _block_score(*stats[id(tag)])
+        if score > best_score:
+            best, best_score = tag, score
+    # A dense inner block that is a small slice of the page usually means we
+    # locked onto one list; fall back to the whole cleaned body in that case.
+    if stats[id(best)][0] < 0.3 * stats[id(body)][0]:
+        best = body
+
+    text = collapse_whitespace(best.get_text(separator="\n"))
+    if len(text) < MIN_POSTING_CHARS:
+        raise EmptyPosting("No job description found on this page; it may need a login or JavaScript.")
+    return CleanResult(text, estimate_tokens(raw_text), estimate_tokens(text), company)
+
+
+def tokens_saved(result):
+    return max(result.raw_tokens - result.clean_tokens, 0)
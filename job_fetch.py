@@ -0,0 +1,131 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from bs4 import UnicodeDammit
+from requests.adapters import HTTPAdapter
+
+USER_AGENT = "Mozilla/5.0"
+# (connect, read) seconds
+DEFAULT_TIMEOUT = (5, 15)
+
+# Query parameters that only track where a click came from
+TRACKING_PREFIXES = ("utm_",)
+TRACKING_PARAMS = {"gclid", "fbclid", "mc_cid", "mc_eid", "ref", "refid", "trk", "trackingid"}
+
+FetchResult = namedtuple("FetchResult", "url text status from_cache revalidated")
+
+
+def normalize_url(url):
+    """Canonical form of a job URL, used as the cache key"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(TRACKING_PREFIXES) and k.lower() not in TRACKING_PARAMS
+    )
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def page_text(response):
+    """The response body as text, decoded the way a browser would.
+
+    requests falls back to ISO-8859-1 for text/html without a charset in the
+    header, which mangles UTF-8 pages ("€" becomes "â\x82¬"). Those are
+    decoded from their <meta charset> or BOM instead.
+    """
+    if "charset=" in response.headers.get("Content-Type", "").lower():
+        return response.text
+    return UnicodeDammit(response.content, is_html=True).unicode_markup
+
+
+def make_session(pool_size=20):
+    """A requests Session with a keep-alive connection pool"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+class _Entry:
+    __slots__ = ("text", "status", "etag", "last_modified", "fresh_until")
+
+    def __init__(self, text, status, etag, last_modified, fresh_until):
+        self.text = text
+        self.status = status
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fresh_until = fresh_until
+
+
+class JobPageFetcher:
+    """Fetch job pages through a pooled session with a TTL cache.
+
+    Within the TTL a page is served from memory. Once it goes stale it is
+    revalidated with If-None-Match / If-Modified-Since, so an unchanged page
+    costs a 304 instead of a full download.
+    """
+
+    def __init__(self, ttl=600, max_entries=256, timeout=DEFAULT_TIMEOUT, session=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.session = session or make_session()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _store(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def fetch(self, url):
+        key = normalize_url(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        now = time.monotonic()
+        if entry is not None and now < entry.fresh_until:
+            return FetchResult(key, entry.text, entry.status, True, False)
+
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304 and entry is not None:
+            entry.fresh_until = time.monotonic() + self.ttl
+            self._store(key, entry)
+            return FetchResult(key, entry.text, entry.status, True, True)
+
+        response.raise_for_status()
+        entry = _Entry(
+            page_text(response),
+            response.status_code,
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+            time.monotonic() + self.ttl,
+        )
+        self._store(key, entry)
+        return FetchResult(key, entry.text, entry.status, False, False)
+
+    def invalidate(self, url):
+        with self._lock:
+            self._entries.pop(normalize_url(url), None)
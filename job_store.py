@@ -0,0 +1,126 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter, namedtuple
+
+from job_clean import MIN_POSTING_CHARS
+from job_fetch import normalize_url
+from prerank import terms
+
+DEFAULT_PATH = os.path.join(".cache", "job_postings.sqlite3")
+# Words every posting uses; useless for telling roles apart
+GENERIC_TERMS = frozenset("""
+job role team work working company experience years year apply candidate candidates position
+opportunity skills ability strong including new join help make well within across based must
+""".split())
+
+Posting = namedtuple("Posting", "url company text keywords fetched_at")
+
+
+def extract_keywords(text, limit=25):
+    """Most frequent distinctive unigrams and repeated bigrams of a posting"""
+    counts = Counter(t for t in terms(text) if t not in GENERIC_TERMS and len(t) > 1)
+    ranked = [
+        term for term, count in counts.most_common()
+        if (" " not in term or count > 1)
+        and not any(word in GENERIC_TERMS for word in term.split())
+    ]
+    return ranked[:limit]
+
+
+class JobStore:
+    """Cleaned job postings keyed by canonical URL, with an inverted keyword index"""
+
+    def __init__(self, path=DEFAULT_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS postings (
+                    url TEXT PRIMARY KEY,
+                    company TEXT,
+                    text TEXT NOT NULL,
+                    keywords TEXT NOT NULL,
+                    fetched_at REAL NOT NULL
+                )"""
+            )
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS terms (
+                    term TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    PRIMARY KEY (term, url)
+                ) WITHOUT ROWID"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS terms_url ON terms (url)")
+
+    def get(self, url, max_age=None):
+        """The stored posting for a URL, or None if unknown, older than max_age or blank"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, company, text, keywords, fetched_at FROM postings WHERE url = ?",
+                (normalize_url(url),),
+            ).fetchone()
+        if row is None:
+            return None
+        posting = Posting(row[0], row[1], row[2], row[3].split("\n") if row[3] else [], row[4])
+        if max_age is not None and time.time() - posting.fetched_at > max_age:
+            return None
+        if len(posting.text.strip()) < MIN_POSTING_CHARS:
+            # Saved by an older version from a page that did not clean properly
+            return None
+        return posting
+
+    def save(self, url, text, company=None):
+        """Store a cleaned posting; blank or very short text is not kept (returns None)"""
+        if len((text or "").strip()) < MIN_POSTING_CHARS:
+            return None
+        key = normalize_url(url)
+        keywords = extract_keywords(text)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO postings (url, company, text, keywords, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (key, company, text, "\n".join(keywords), time.time()),
+            )
+            self._conn.execute("DELETE FROM terms WHERE url = ?", (key,))
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO terms (term, url) VALUES (?, ?)",
+                [(term, key) for term in keywords],
+            )
+        return Posting(key, company, text, keywords, time.time())
+
+    def forget(self, url):
+        """Drop a stored posting, so the next lookup fetches the page again"""
+        key = normalize_url(url)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM postings WHERE url = ?", (key,))
+            self._conn.execute("DELETE FROM terms WHERE url = ?", (key,))
+
+    def search(self, keywords, limit=5, exclude=None):
+        """(url, company, shared keyword count) for postings sharing the most keywords"""
+        keywords = list(dict.fromkeys(keywords))
+        if not keywords:
+            return []
+        placeholders = ",".join("?" * len(keywords))
+        with self._lock:
+            ranked = self._conn.execute(
+                f"""SELECT url, COUNT(*) AS shared FROM terms
+                WHERE term IN ({placeholders}) AND url != ?
+                GROUP BY url ORDER BY shared DESC LIMIT ?""",
+                (*keywords, normalize_url(exclude) if exclude else "", limit),
+            ).fetchall()
+            companies = dict(self._conn.execute(
+                f"SELECT url, company FROM postings WHERE url IN ({','.join('?' * len(ranked))})",
+                [url for url, _ in ranked],
+            ).fetchall()) if ranked else {}
+        return [(url, companies.get(url), shared) for url, shared in ranked]
+
+    def similar(self, url, limit=5):
+        """Already-seen postings most like the one at url"""
+        posting = self.get(url)
+        if posting is None:
+            return []
+        return self.search(posting.keywords, limit, exclude=posting.url)
@@ -0,0 +1,99 @@
+"""Cheap local CV x job similarity, used to skip obvious mismatches before
+spending a Gemini call on them."""
+import re
+from collections import Counter
+
+import numpy as np
+
+TOKEN = re.compile(r"[a-z][a-z0-9+#.]*[a-z0-9+#]|[a-z]")
+STOPWORDS = frozenset("""
+a about above after all also an and any are as at be been being but by can could did do does
+for from had has have having he her here his how i if in into is it its just may me more most
+my no nor not of on once only or other our out over own same she should so some such than that
+the their them then there these they this those through to too under until up very was we were
+what when where which while who whom why will with would you your
+""".split())
+
+
+def terms(text):
+    """Lower-cased word unigrams and bigrams, stopwords dropped"""
+    words = [w for w in TOKEN.findall(text.lower()) if w not in STOPWORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def _term_arrays(counts_list, index):
+    """Flattened (doc, term id, count) arrays for a list of Counters"""
+    ids = [np.fromiter((index.setdefault(t, len(index)) for t in counts), dtype=np.int64, count=len(counts))
+           for counts in counts_list]
+    tallies = [np.fromiter(counts.values(), dtype=np.float32, count=len(counts)) for counts in counts_list]
+    lengths = np.array([len(i) for i in ids], dtype=np.int64)
+    docs = np.repeat(np.arange(len(counts_list)), lengths)
+    return docs, np.concatenate(ids), np.concatenate(tallies)
+
+
+def similarity_matrix(cv_texts, job_texts, chunk_rows=256):
+    """Cosine similarity of TF-IDF vectors, shape (len(cv_texts), len(job_texts)).
+
+    Jobs become a dense matrix over the job vocabulary; CVs stay as sparse
+    (doc, term, weight) triples, since only terms shared with some job can
+    contribute to a dot product. CV norms still use every CV term so long
+    CVs are not favoured.
+    """
+    n_cv, n_job = len(cv_texts), len(job_texts)
+    if not n_cv or not n_job:
+        return np.zeros((n_cv, n_job), dtype=np.float32)
+
+    index = {}
+    docs, ids, tallies = _term_arrays([Counter(terms(t)) for t in list(cv_texts) + list(job_texts)], index)
+    n_docs = n_cv + n_job
+
+    doc_freq = np.bincount(ids, minlength=len(index))
+    idf = (np.log((1 + n_docs) / (1 + doc_freq)) + 1).astype(np.float32)
+    weights = (1 + np.log(tallies)) * idf[ids]
+    norms = np.sqrt(np.bincount(docs, weights=weights * weights, minlength=n_docs)).astype(np.float32)
+    norms[norms == 0] = 1
+
+    # Column of each term in the job vocabulary, -1 for CV-only terms
+    is_job = docs >= n_cv
+    column = np.full(len(index), -1, dtype=np.int64)
+    job_terms = np.unique(ids[is_job])
+    column[job_terms] = np.arange(len(job_terms))
+
+    jobs_t = np.zeros((len(job_terms), n_job), dtype=np.float32)
+    jobs_t[column[ids[is_job]], docs[is_job] - n_cv] = weights[is_job] / norms[docs[is_job]]
+
+    shared = ~is_job & (column[ids] >= 0)
+    cv_docs, cv_cols = docs[shared], column[ids[shared]]
+    cv_weights = weights[shared] / norms[cv_docs]
+
+    scores = np.zeros((n_cv, n_job), dtype=np.float32)
+    # Bounded chunks of CVs keep the (terms x jobs) intermediate small
+    bounds = np.searchsorted(cv_docs, np.arange(0, n_cv + chunk_rows, chunk_rows))
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        if lo == hi:
+            continue
+        chunk_docs = cv_docs[lo:hi]
+        contrib = cv_weights[lo:hi, None] * jobs_t[cv_cols[lo:hi]]
+        starts = np.flatnonzero(np.r_[True, chunk_docs[1:] != chunk_docs[:-1]])
+        scores[chunk_docs[starts]] = np.add.reduceat(contrib, starts, axis=0)
+    return scores
+
+
+def select_pairs(scores, threshold=None, top_k=None):
+    """(cv_index, job_index) pairs worth a full LLM analysis.
+
+    top_k keeps the best k CVs per job; threshold drops pairs below a
+    similarity. With neither, every pair is kept.
+    """
+    if top_k is not None and top_k < 1:
+        raise ValueError(f"top_k must be at least 1, got {top_k}")
+    keep = np.ones(scores.shape, dtype=bool)
+    if threshold is not None:
+        keep &= scores >= threshold
+    if top_k is not None and scores.shape[0] > top_k:
+        # k-th largest score in each job column
+        cutoff = -np.partition(-scores, top_k - 1, axis=0)[top_k - 1]
+        keep &= scores >= cutoff
+    cv_index, job_index = np.nonzero(keep)
+    order = np.argsort(-scores[cv_index, job_index], kind="stable")
+    return list(zip(cv_index[order].tolist(), job_index[order].tolist()))
@@ -0,0 +1,108 @@
+import os
+from collections import namedtuple
+
+from cv_model import cv_digest, parse_cv, question_type
+from tokens import CHARS_PER_TOKEN, estimate_tokens
+
+# Bump when the wording of a template changes; cached responses are keyed on it
+PROMPT_VERSION = "3"
+DEFAULT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "12000"))
+TRUNCATION_MARK = "\n[... truncated to fit the prompt budget]"
+
+# priority: lower numbers are kept longest. min_tokens: never cut below this.
+Section = namedtuple("Section", "title text priority min_tokens")
+Prompt = namedtuple("Prompt", "text tokens truncated")
+
+ANALYSIS_TASK = """Provide a structured analysis:
+- Extract the probable company name from the job description above.
+- Comment on company reputation (if the information is available).
+- Candidate key strengths (skills/experience that match).
+- Gaps or missing qualifications.
+- Evaluate cultural fit based on company values and candidate’s background.
+- Probability of fit (low/medium/high).
+- Advice to improve chances.
+- Numeric fit score (0–100) with explanation.
+Answer with one JSON object holding these fields."""
+
+CHAT_TASK = """- Extract the probable company name from the job description above.
+- Comment on company reputation (if the information is available).
+- Respond to the candidate named in the CV above (if provided) with professional advice about the question below, using the job description above for relevant reference."""
+
+
+def _truncate(text, max_tokens):
+    max_chars = max(max_tokens * CHARS_PER_TOKEN - len(TRUNCATION_MARK), 0)
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    # Prefer to stop at the end of a line rather than mid-word
+    newline = cut.rfind("\n")
+    if newline > max_chars // 2:
+        cut = cut[:newline]
+    return cut + TRUNCATION_MARK
+
+
+def _render(sections):
+    return "\n\n".join(f"{s.title}:\n{s.text}" for s in sections if s.text)
+
+
+def assemble(sections, budget=DEFAULT_TOKEN_BUDGET):
+    """Join sections into one prompt that fits the token budget.
+
+    While the prompt is over budget the least important section is cut back,
+    never below its min_tokens, before moving on to the next one.
+    """
+    sections = list(sections)
+    truncated = []
+    for index in sorted(range(len(sections)), key=lambda i: -sections[i].priority):
+        overflow = estimate_tokens(_render(sections)) - budget
+        if overflow <= 0:
+            break
+        section = sections[index]
+        current = estimate_tokens(section.text)
+        target = max(current - overflow, section.min_tokens)
+        if target < current:
+            sections[index] = section._replace(text=_truncate(section.text, target))
+            truncated.append(section.title)
+    text = _render(sections)
+    return Prompt(text, estimate_tokens(text), truncated)
+
+
+def document_sections(cv_text, job_text, kind="analysis"):
+    """The CV digest for kind and the job description, each included once"""
+    return [
+        Section("Candidate CV", cv_digest(parse_cv(cv_text), kind), 1, 1000),
+        Section("Job Description", job_text, 2, 1000),
+    ]
+
+
+def build_analysis_prompt(cv_text, job_text, company_intel="", budget=DEFAULT_TOKEN_BUDGET):
+    sections = document_sections(cv_text, job_text)
+    sections.append(Section("Company News and Reviews", company_intel, 3, 0))
+    sections.append(Section("Task", ANALYSIS_TASK, 0, 0))
+    return assemble(sections, budget)
+
+
+def chat_turn_sections(question, earlier=""):
+    return [
+        Section("Earlier in this conversation", earlier, 3, 0),
+        Section("Task", CHAT_TASK, 0, 0),
+        Section("Question", question, 0, 0),
+    ]
+
+
+def build_chat_prompt(cv_text, job_text, question, earlier="", budget=DEFAULT_TOKEN_BUDGET):
+    sections = document_sections(cv_text, job_text, question_type(question))
+    return assemble(sections + chat_turn_sections(question, earlier), budget)
+
+
+def build_chat_context(cv_text, job_text, budget=DEFAULT_TOKEN_BUDGET):
+    """Just the documents, for a server-side cached context.
+
+    The context serves every later question, so it carries the general digest.
+    """
+    return assemble(document_sections(cv_text, job_text, "general"), budget)
+
+
+def build_chat_turn(question, earlier=""):
+    """The per-turn part of a chat prompt whose documents are cached"""
+    return assemble(chat_turn_sections(question, earlier))
@@ -0,0 +1,77 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+DEFAULT_PATH = os.path.join(".cache", "responses.sqlite3")
+
+
+def _normalize(text):
+    # Whitespace-only differences (re-extraction, trailing newlines) share a key
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+def response_key(cv_text, job_text, model, prompt_version):
+    """Hash of everything that determines the model's answer"""
+    digest = hashlib.sha256()
+    for part in (_normalize(cv_text), _normalize(job_text), model, prompt_version):
+        digest.update(hashlib.sha256(part.encode("utf-8")).digest())
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """Model responses in a local SQLite file with TTL and size eviction"""
+
+    def __init__(self, path=DEFAULT_PATH, ttl=7 * 24 * 3600, max_entries=5000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # One connection shared across Streamlit's session threads, serialized by the lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+
+    def get(self, key):
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            response, created_at = row
+            if now - created_at > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            return response
+
+    def put(self, key, response):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, response, now, now),
+            )
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+            # Least recently read entries go first once the cache is over size
+            self._conn.execute(
+                """DELETE FROM responses WHERE key IN (
+                    SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )""",
+                (self.max_entries,),
+            )
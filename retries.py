@@ -0,0 +1,53 @@
+import random
+import re
+import time
+
+import httpx
+import requests
+from google.genai import errors
+
+# Rate limited or a transient server-side failure
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+def is_retryable(exc):
+    if isinstance(exc, errors.APIError):
+        return exc.code in RETRYABLE_STATUS
+    # genai talks over httpx; company intel and job pages over requests
+    return isinstance(exc, (httpx.TransportError, requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+
+def suggested_delay(exc):
+    """Seconds the server asked us to wait, if it said"""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    retry_after = headers.get("Retry-After") if hasattr(headers, "get") else None
+    if retry_after and retry_after.strip().isdigit():
+        return float(retry_after)
+    # Gemini puts RetryInfo in the error details, e.g. "retryDelay": "37s"
+    match = re.search(r"retryDelay['\"]?\s*[:=]\s*['\"]?(\d+(?:\.\d+)?)s", str(getattr(exc, "details", "")))
+    if match:
+        return float(match.group(1))
+    return None
+
+
+def backoff_delay(attempt, base_delay=1.0, max_delay=60.0):
+    """Exponential backoff with full jitter for the given 0-based attempt"""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def call_with_retries(fn, attempts=5, base_delay=1.0, max_delay=60.0, sleep=time.sleep, on_retry=None):
+    """Call fn(), retrying rate-limit and transient errors with backoff"""
+    for attempt in range(attempts):
+        try:
+            return fn()
+        except Exception as exc:
+            if attempt == attempts - 1 or not is_retryable(exc):
+                raise
+            delay = backoff_delay(attempt, base_delay, max_delay)
+            hinted = suggested_delay(exc)
+            if hinted is not None:
+                delay = max(delay, min(hinted, max_delay))
+            if on_retry:
+                on_retry(exc, attempt + 1, delay)
+            sleep(delay)
@@ -0,0 +1,127 @@
+import os
+import re
+from collections import namedtuple
+
+from google.genai import types
+
+from prompts import build_chat_prompt, build_chat_turn
+
+LOCAL = "local"
+FAST = "fast"
+FULL = "full"
+PATHS = (LOCAL, FAST, FULL)
+
+Route = namedtuple("Route", "path topic answer")
+# What a model-bound chat turn sends; cached names the context cache it references, if any
+ChatRequest = namedtuple("ChatRequest", "model prompt config cached")
+
+# Topic, what a question about it looks like, and the job-text lines that
+# answer it, strongest first: a labelled "Salary: ..." line beats a stray "€".
+# Question patterns are phrases, not bare words: "how close is my background"
+# is not about the deadline, nor "what stage is the startup at" the interviews.
+JOB_FACTS = [
+    ("salary", r"salary|compensation|\bwages?\b|\bpay (range|band|scale)\b|\b(the|base) pay\b|\bwell paid\b"
+               r"|\b(what|how much) (does|will|would) (it|this( role| job| position)?|the (role|job|position)) pay\b"
+               r"|how much (will|do) i (earn|make|get)",
+     [r"\b(salary|compensation|pay range|base pay|wage)\b", r"[£$€]\s?\d[\d,.]*\s?k?\s*(-|–|to|per|/|an? )"]),
+    ("location", r"\bwhere (is|are|will|would) (it|this|the (job|role|position|office|team))\b|\blocat(ed|ion)\b"
+                 r"|\bbased (in|at|out of)\b|\bremote\b|\bhybrid\b|on-?site|work from home"
+                 r"|\b(which|what) office\b|office (location|address)|\bin (the|an) office\b",
+     [r"\blocation\b|\bbased in\b", r"\bremote\b|\bhybrid\b|on-?site|\bin[- ]office\b"]),
+    ("deadline", r"deadline|closing date|apply by|last (day|date) to apply"
+                 r"|\bwhen (does|do|will|is) (it|this|the (application|applications|posting|job|role|vacancy|advert)) clos",
+     [r"closing date|deadline|apply by|applications? close", r"\bby \d{1,2} \w+ \d{4}\b"]),
+    ("hours", r"\b(working|work|office) hours\b|how many hours|hours (a|per) week|\bshifts\b|shift (pattern|work)"
+              r"|night shift|\b(work|working) (schedule|pattern)\b|full-?time|part-?time",
+     [r"shift pattern|\bshifts?\b|working hours|hours (per|a) week|\brota\b", r"full-?time|part-?time"]),
+    ("benefits", r"\bbenefits\b|\bperks?\b|holiday|annual leave|vacation|pension|\b(stock|share) options?\b"
+                 r"|\bequity (grant|package|stake)\b|\b(any|offer|is there) equity\b",
+     [r"\bbenefits?\b|\bperks?\b", r"holiday|annual leave|vacation|pension|stock options|equity"]),
+    ("process", r"\binterview|(hiring|recruitment|application|selection) process"
+                r"|\b(interview|hiring|application) (stages?|rounds?|steps?)\b|stages of the (hiring |interview )?process",
+     [r"\binterview", r"(hiring|our|recruitment) process|\bround\b|take-home|assessment"]),
+]
+_FACTS = [
+    (topic, re.compile(question, re.I), [re.compile(line, re.I) for line in lines])
+    for topic, question, lines in JOB_FACTS
+]
+# Questions that ask for judgement about the candidate, not a fact from the posting
+ADVISORY = re.compile(
+    r"\b(should|could|would|can) i\b|\bhow (can|do|should|to|would) i\b|advi[cs]e|improve|chances?\b|\bfit\b"
+    r"|suitab|qualif|prepare|cover letter|negotiat|stand out|tailor|\bwhy\b|compare|strateg|recommend"
+    r"|strength|strong|weakness|\b(am|do|have) i\b|\bgood\b|\bfair\b|enough|worth|competitive|realistic"
+    # Anything about the candidate themselves: "how close is my background to ..."
+    r"|\b(my|me|myself)\b",
+    re.I,
+)
+# Longer questions are rarely simple lookups
+MAX_FAST_WORDS = 25
+MAX_LOCAL_LINES = 2
+MAX_LOCAL_CHARS = 300
+# Prompt budget for FAST questions: the digest of the relevant sections, not everything
+FAST_PROMPT_BUDGET = int(os.getenv("FAST_PROMPT_BUDGET", "4000"))
+
+
+def _sentences(job_text):
+    for line in job_text.splitlines():
+        for sentence in re.split(r"(?<=[.!?])\s+", line.strip()):
+            # Headings like "Compensation and benefits" name a topic without answering it
+            if len(sentence.split()) <= 4 and not re.search(r"[\d:·,]", sentence):
+                continue
+            if sentence and len(sentence) <= MAX_LOCAL_CHARS:
+                yield sentence
+
+
+def local_answer(topic_lines, job_text):
+    """The job-text lines that answer a topic, quoted, or None if none match"""
+    sentences = list(_sentences(job_text))
+    for pattern in topic_lines:
+        found = [s for s in sentences if pattern.search(s)][:MAX_LOCAL_LINES]
+        if found:
+            return "From the job posting:\n\n" + "\n\n".join(f"> {s}" for s in found)
+    return None
+
+
+def route_question(question, job_text, fast_tier=True):
+    """Which path answers question: LOCAL (with its answer), FAST or FULL.
+
+    Fact lookups answered by a line of the posting never reach a model;
+    advisory or long questions get the full model and context. With
+    fast_tier off, everything that needs a model takes the full path.
+    """
+    advisory = bool(ADVISORY.search(question))
+    topic = None
+    if not advisory:
+        for name, asks, lines in _FACTS:
+            if asks.search(question):
+                topic = name
+                answer = local_answer(lines, job_text or "")
+                if answer:
+                    return Route(LOCAL, topic, answer)
+                break
+    if advisory or len(question.split()) > MAX_FAST_WORDS or not fast_tier:
+        return Route(FULL, topic, None)
+    return Route(FAST, topic, None)
+
+
+def chat_request(route, cv_text, job_text, question, earlier, context_cache, fast_model, trace):
+    """The model, prompt and config for a FAST or FULL route.
+
+    FULL turns go to context_cache.model and reference its cached CV and job
+    when there is one. FAST turns go to fast_model with a smaller inline
+    prompt, since cached content is tied to the model it was made for.
+    Hand request.cached to context_cache.done() once the turn has finished.
+    """
+    cached = None
+    if route.path == FULL:
+        with trace.stage("context_cache"):
+            cached = context_cache.name_for(cv_text, job_text)
+        trace.cache_result("chat_context", bool(cached))
+    with trace.stage("prompt_build"):
+        if route.path == FAST:
+            return ChatRequest(fast_model, build_chat_prompt(cv_text, job_text, question, earlier,
+                                                             budget=FAST_PROMPT_BUDGET), None, None)
+        if cached:
+            return ChatRequest(context_cache.model, build_chat_turn(question, earlier),
+                               types.GenerateContentConfig(cached_content=cached), cached)
+        return ChatRequest(context_cache.model, build_chat_prompt(cv_text, job_text, question, earlier), None, None)
@@ -0,0 +1,168 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+from retries import backoff_delay, is_retryable, suggested_delay
+
+
+class TokenBucket:
+    """rate tokens per second, holding at most capacity"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now=None):
+        """Seconds until a token is available (0 if one is available now)"""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now=None):
+        self._refill(time.monotonic() if now is None else now)
+        self.tokens -= 1
+
+
+class _Ticket:
+    __slots__ = ("session_id",)
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+
+
+class GeminiScheduler:
+    """Process-wide gate in front of every Gemini call.
+
+    Calls are admitted at the rate of a token bucket sized to the quota, with
+    at most max_in_flight running at once. Waiting calls are served
+    round-robin across sessions, so one busy user cannot starve the others.
+    """
+
+    def __init__(self, requests_per_minute=10, burst=None, max_in_flight=8):
+        self.bucket = TokenBucket(requests_per_minute / 60.0, burst or max(1, requests_per_minute // 6))
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self._queues = OrderedDict()  # session_id -> deque of tickets, in round-robin order
+        self._cond = threading.Condition()
+        self.admitted = 0
+        self.retried = 0
+
+    def _fair_order(self):
+        """Every waiting ticket in the order it will be admitted"""
+        queues = [list(q) for q in self._queues.values()]
+        order = []
+        for depth in range(max((len(q) for q in queues), default=0)):
+            order.extend(q[depth] for q in queues if depth < len(q))
+        return order
+
+    def _position(self, ticket, order):
+        """(1-based queue position, estimated seconds until admitted); call under the lock"""
+        ahead = order.index(ticket) if ticket in order else 0
+        return ahead + 1, self.bucket.wait_time() + ahead / self.bucket.rate
+
+    def _acquire(self, ticket, on_wait):
+        next_report = 0.0
+        while True:
+            with self._cond:
+                order = self._fair_order()
+                if order and order[0] is ticket and self.in_flight < self.max_in_flight:
+                    delay = self.bucket.wait_time()
+                    if delay <= 0:
+                        self.bucket.take()
+                        queue = self._queues[ticket.session_id]
+                        queue.popleft()
+                        # The served session goes to the back of the rotation
+                        del self._queues[ticket.session_id]
+                        if queue:
+                            self._queues[ticket.session_id] = queue
+                        self.in_flight += 1
+                        self.admitted += 1
+                        self._cond.notify_all()
+                        return
+                else:
+                    delay = 0.5
+                position, eta = self._position(ticket, order)
+                if not on_wait or time.monotonic() < next_report:
+                    self._cond.wait(timeout=min(delay, 0.5))
+                    continue
+            # Report outside the lock; the callback may be slow UI code
+            on_wait(position, eta)
+            next_report = time.monotonic() + 1.0
+
+    def _release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, session_id, on_wait=None, on_admit=None):
+        """Block until this session may make one Gemini call.
+
+        on_wait(position, eta) is called about once a second while waiting,
+        on_admit() once the call is let through.
+        """
+        ticket = _Ticket(session_id)
+        with self._cond:
+            self._queues.setdefault(session_id, deque()).append(ticket)
+        try:
+            self._acquire(ticket, on_wait)
+        except BaseException:
+            with self._cond:
+                queue = self._queues.get(session_id)
+                if queue and ticket in queue:
+                    queue.remove(ticket)
+                    if not queue:
+                        del self._queues[session_id]
+                self._cond.notify_all()
+            raise
+        try:
+            if on_admit:
+                on_admit()
+            yield
+        finally:
+            self._release()
+
+    def _retry_wait(self, exc, attempt, base_delay, max_delay):
+        self.retried += 1
+        delay = backoff_delay(attempt, base_delay, max_delay)
+        hinted = suggested_delay(exc)
+        if hinted is not None:
+            delay = max(delay, min(hinted, max_delay))
+        time.sleep(delay)
+
+    def call(self, session_id, fn, on_wait=None, attempts=5, base_delay=1.0, max_delay=30.0, on_admit=None):
+        """fn() inside a slot, retrying 429/5xx with jittered backoff"""
+        for attempt in range(attempts):
+            try:
+                with self.slot(session_id, on_wait, on_admit):
+                    return fn()
+            except Exception as exc:
+                if attempt == attempts - 1 or not is_retryable(exc):
+                    raise
+                self._retry_wait(exc, attempt, base_delay, max_delay)
+
+    def stream(self, session_id, start, on_wait=None, attempts=5, base_delay=1.0, max_delay=30.0, on_admit=None):
+        """Yield from start()'s stream inside a slot.
+
+        A failure before the first chunk is retried like call(); once output
+        has been shown it is re-raised rather than restarted.
+        """
+        for attempt in range(attempts):
+            started = False
+            try:
+                with self.slot(session_id, on_wait, on_admit):
+                    for chunk in start():
+                        started = True
+                        yield chunk
+                return
+            except Exception as exc:
+                if started or attempt == attempts - 1 or not is_retryable(exc):
+                    raise
+                self._retry_wait(exc, attempt, base_delay, max_delay)
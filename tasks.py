@@ -0,0 +1,213 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class TaskCancelled(Exception):
+    """Raised by a worker to abandon a task that was cancelled"""
+
+
+class Task:
+    """One background generation whose output grows while it runs.
+
+    The worker appends text and sets meta; any number of readers can
+    attach, take the output so far and wait for more.
+    """
+
+    def __init__(self, session_id, request_id):
+        self.session_id = session_id
+        self.request_id = request_id
+        self.text = ""
+        self.meta = {}
+        self.status = PENDING
+        self.error = None
+        self.created = time.time()
+        self.finished_at = None
+        self.version = 0
+        self._cancel = threading.Event()
+        self._cond = threading.Condition()
+
+    @property
+    def finished(self):
+        return self.status in FINISHED
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def _changed(self, **fields):
+        with self._cond:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self.version += 1
+            self._cond.notify_all()
+
+    def append(self, piece):
+        with self._cond:
+            self.text += piece
+            self.version += 1
+            self._cond.notify_all()
+
+    def update(self, **meta):
+        with self._cond:
+            self.meta.update(meta)
+            self.version += 1
+            self._cond.notify_all()
+
+    def cancel(self):
+        """Ask the worker to stop at its next chunk"""
+        self._cancel.set()
+
+    def follow(self, poll=0.5):
+        """Yield the task whenever it changes, and at least every poll seconds,
+        until it has finished.
+
+        The heartbeat gives the reader regular control even when nothing
+        changed: a Streamlit script must make an st.* call or touch
+        session_state then, since that is where it notices a rerun. Leaving
+        the loop detaches without affecting the worker.
+        """
+        seen = -1
+        while True:
+            with self._cond:
+                if self.version == seen and not self.finished:
+                    self._cond.wait(poll)
+                seen = self.version
+                finished = self.finished
+            yield self
+            if finished:
+                return
+
+
+class TaskPool:
+    """Process-wide workers for generation that must outlive a script rerun.
+
+    Tasks are keyed by (session_id, request_id). Submitting a key that is
+    already running or finished returns that task instead of starting the
+    work again; finished tasks are kept for keep_finished seconds.
+
+    Size max_workers so that tasks wait for quota in the scheduler's fair
+    queue, not here. A task that still has to wait for a worker gets its
+    place in line as meta["queue"] = (position, None).
+    """
+
+    def __init__(self, max_workers=64, keep_finished=900):
+        self.keep_finished = keep_finished
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="task")
+        self._tasks = {}
+        self._lock = threading.Lock()
+        self._backlog = []  # handed to the executor, not yet on a worker
+        self._busy = 0
+
+    def _prune(self):
+        cutoff = time.time() - self.keep_finished
+        for key, task in list(self._tasks.items()):
+            if task.finished and task.finished_at < cutoff:
+                del self._tasks[key]
+
+    def _report_backlog(self):
+        with self._lock:
+            free = max(self.max_workers - self._busy, 0)
+            waiting = self._backlog[free:]
+        for position, task in enumerate(waiting, 1):
+            task.update(queue=(position, None))
+
+    def _dispatch(self, task, fn, then):
+        """Hand task to the executor; then() runs once it has finished"""
+        with self._lock:
+            self._backlog.append(task)
+        self._executor.submit(self._work, task, fn, then)
+        self._report_backlog()
+
+    def _work(self, task, fn, then):
+        with self._lock:
+            self._backlog.remove(task)
+            self._busy += 1
+        self._report_backlog()
+        try:
+            self._run(task, fn)
+        finally:
+            with self._lock:
+                self._busy -= 1
+            then()
+
+    def _run(self, task, fn):
+        if task.cancelled:
+            task._changed(status=CANCELLED, finished_at=time.time())
+            return
+        with task._cond:
+            # A worker is free now; only the scheduler can still keep it waiting
+            task.meta.pop("queue", None)
+        task._changed(status=RUNNING)
+        try:
+            fn(task)
+        except Exception as exc:
+            if task.cancelled:
+                task._changed(status=CANCELLED, finished_at=time.time())
+            else:
+                task._changed(status=FAILED, error=exc, finished_at=time.time())
+        else:
+            task._changed(status=CANCELLED if task.cancelled else DONE, finished_at=time.time())
+
+    def submit(self, session_id, request_id, fn):
+        """Run fn(task) in the background, or return the task already under this key.
+
+        A failed or cancelled task is replaced, so asking again retries it.
+        """
+        return self.submit_many(session_id, [(request_id, fn)])[0]
+
+    def submit_many(self, session_id, jobs, limit=None):
+        """Like submit() for each (request_id, fn), with at most limit running at once.
+
+        Every task is registered (and can be followed or cancelled) straight
+        away; the ones over the limit stay pending and start, in order, as
+        earlier ones finish, so waiting never ties up a worker.
+        """
+        tasks = []
+        queue = deque()
+        with self._lock:
+            self._prune()
+            for request_id, fn in jobs:
+                key = (session_id, request_id)
+                task = self._tasks.get(key)
+                if task is None or task.status in (FAILED, CANCELLED):
+                    task = self._tasks[key] = Task(session_id, request_id)
+                    queue.append((task, fn))
+                tasks.append(task)
+        queue_lock = threading.Lock()
+
+        def start_next():
+            with queue_lock:
+                if not queue:
+                    return
+                task, fn = queue.popleft()
+            self._dispatch(task, fn, start_next)
+
+        for _ in range(len(queue) if limit is None else limit):
+            start_next()
+        return tasks
+
+    def get(self, session_id, request_id):
+        with self._lock:
+            return self._tasks.get((session_id, request_id))
+
+    def cancel(self, session_id, request_id=None):
+        """Cancel one request, or every unfinished task of a session"""
+        with self._lock:
+            tasks = [
+                task for (sid, rid), task in self._tasks.items()
+                if sid == session_id and (request_id is None or rid == request_id)
+            ]
+        for task in tasks:
+            if not task.finished:
+                task.cancel()
+        return tasks
@@ -4,11 +4,15 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import streamlit as st
-import google.generativeai as genai
+from google import genai
 
 # Gemini API config
 API_KEY = os.getenv("GEMINI_API_KEY")
-genai.configure(api_key=API_KEY)
+
+@st.cache_resource
+def get_client(api_key):
+    # Built once per process rather than on every rerun
+    return genai.Client(api_key=api_key)
 
 # Streamlit page config
 st.set_page_config(page_title="Job Applicant Helper Chatbot", layout="centered")
@@ -137,9 +141,9 @@ if prompt and "have_cv" in st.session_state:
 
         # Call Gemini API
         try:
-            model = genai.GenerativeModel('gemini-2.5-flash')
-            response = model.generate_content(
-                f"You are a helpful jobs application assessment expert. Please provide a summarized but accurate, and friendly information about: {prompt}"
+            response = get_client(API_KEY).models.generate_content(
+                model="gemini-2.5-flash",
+                contents=f"You are a helpful jobs application assessment expert. Please provide a summarized but accurate, and friendly information about: {prompt}"
             )
 
             # Extract response text
@@ -0,0 +1,10 @@
+# Gemini averages roughly four characters of English per token. This is only
+# used for budgeting and reporting, never for billing.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """Rough token count for a piece of text"""
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
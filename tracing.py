@@ -0,0 +1,139 @@
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_LOG_PATH = os.path.join(".cache", "requests.jsonl")
+
+
+class Trace:
+    """Timings, sizes and cache outcomes for one interaction.
+
+    Stages are timed with a monotonic clock in milliseconds; record() adds
+    a duration measured elsewhere, e.g. time-to-first-token.
+    """
+
+    def __init__(self, kind="rerun", session_id=None):
+        self.kind = kind
+        self.session_id = session_id
+        self.started = time.monotonic()
+        self.stages = {}
+        self.counts = {}
+        self.cache = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + (time.monotonic() - start) * 1000
+
+    def record(self, name, ms):
+        self.stages[name] = self.stages.get(name, 0.0) + ms
+
+    def count(self, name, value):
+        self.counts[name] = value
+
+    def cache_result(self, name, hit):
+        self.cache[name] = "hit" if hit else "miss"
+
+    def to_record(self):
+        return {
+            "ts": time.time(),
+            "kind": self.kind,
+            "session": self.session_id,
+            "total_ms": round((time.monotonic() - self.started) * 1000, 3),
+            "stages_ms": {name: round(ms, 3) for name, ms in self.stages.items()},
+            "counts": self.counts,
+            "cache": self.cache,
+        }
+
+
+class TraceLog:
+    """Append-only JSON-lines log, one line per interaction"""
+
+    def __init__(self, path=DEFAULT_LOG_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def write(self, trace):
+        line = json.dumps(trace.to_record(), ensure_ascii=False)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+def read_records(path=DEFAULT_LOG_PATH, limit=None):
+    """Records from a trace log, newest last; malformed lines are skipped"""
+    records = []
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        return []
+    return records[-limit:] if limit else records
+
+
+def _percentile(sorted_values, pct):
+    # Nearest-rank percentile
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[max(rank, 1) - 1]
+
+
+def stage_percentiles(records):
+    """{stage: {count, p50, p95, p99}} over every record that has the stage"""
+    samples = {}
+    for record in records:
+        samples.setdefault("total", []).append(record.get("total_ms", 0.0))
+        for name, ms in record.get("stages_ms", {}).items():
+            samples.setdefault(name, []).append(ms)
+    summary = {}
+    for name, values in samples.items():
+        values.sort()
+        summary[name] = {
+            "count": len(values),
+            "p50": _percentile(values, 50),
+            "p95": _percentile(values, 95),
+            "p99": _percentile(values, 99),
+        }
+    return summary
+
+
+def cache_hit_rates(records):
+    """{cache name: (hits, misses)}"""
+    rates = {}
+    for record in records:
+        for name, outcome in record.get("cache", {}).items():
+            hits, misses = rates.get(name, (0, 0))
+            rates[name] = (hits + 1, misses) if outcome == "hit" else (hits, misses + 1)
+    return rates
+
+
+def count_summary(records, name):
+    """{count, p50, p95, max} of one recorded count, or None if never recorded"""
+    values = sorted(
+        r["counts"][name] for r in records
+        if isinstance(r.get("counts", {}).get(name), (int, float))
+    )
+    if not values:
+        return None
+    return {
+        "count": len(values),
+        "p50": _percentile(values, 50),
+        "p95": _percentile(values, 95),
+        "max": values[-1],
+    }
+
+
+def label_shares(records, name):
+    """{value: (count, share)} of a label recorded with Trace.count, e.g. the chat route"""
+    values = [r["counts"][name] for r in records if isinstance(r.get("counts", {}).get(name), str)]
+    return {value: (values.count(value), values.count(value) / len(values)) for value in sorted(set(values))}
@@ -0,0 +1,85 @@
+import os
+import sys
+import zipfile
+from collections import namedtuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from cv_extract import open_buffer
+
+MAX_UPLOAD_MB = float(os.getenv("MAX_UPLOAD_MB", "10"))
+# Portfolio CVs run to 30+ pages and are extracted in parallel; this only
+# stops documents that are plainly not a CV
+MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", "100"))
+# Guards against zip bombs; real CVs are well under this once unpacked
+MAX_DOCX_UNPACKED_MB = float(os.getenv("MAX_DOCX_UNPACKED_MB", "50"))
+
+Upload = namedtuple("Upload", "name data size pages")
+
+
+class UploadRejected(ValueError):
+    """An upload over the size or page limits; the message is shown to the user"""
+
+
+def _pdf_pages(data):
+    import pdfplumber
+
+    # Only the page tree is read here, not the page contents
+    with pdfplumber.open(open_buffer(data)) as pdf:
+        return len(pdf.pages)
+
+
+def _docx_unpacked_bytes(data):
+    with zipfile.ZipFile(open_buffer(data)) as archive:
+        return sum(info.file_size for info in archive.infolist())
+
+
+def read_upload(uploaded_file, check_contents=True, max_mb=MAX_UPLOAD_MB, max_pages=MAX_PDF_PAGES):
+    """Check an uploaded CV against the limits and return a zero-copy view of it.
+
+    The size is checked before the bytes are touched and (with
+    check_contents) the page count before any text is extracted, so an
+    oversized file costs almost nothing. data is a memoryview on the
+    uploader's own buffer; every extractor reads it in place through
+    cv_extract.open_buffer.
+    """
+    size = uploaded_file.size
+    if size > max_mb * 2**20:
+        raise UploadRejected(f"This file is {size / 2**20:.1f} MB; the limit is {max_mb:g} MB.")
+    data = uploaded_file.getbuffer()
+    name = uploaded_file.name
+    pages = None
+    if not check_contents:
+        return Upload(name, data, size, pages)
+    try:
+        if name.lower().endswith(".pdf"):
+            pages = _pdf_pages(data)
+            if pages > max_pages:
+                raise UploadRejected(f"This PDF has {pages} pages; the limit is {max_pages}.")
+        elif name.lower().endswith(".docx"):
+            if _docx_unpacked_bytes(data) > MAX_DOCX_UNPACKED_MB * 2**20:
+                raise UploadRejected("This Word file unpacks to more than we can safely read.")
+    except UploadRejected:
+        raise
+    except Exception as exc:
+        raise UploadRejected(f"This file could not be opened as {name.rsplit('.', 1)[-1].upper()}: {exc}") from exc
+    return Upload(name, data, size, pages)
+
+
+def peak_rss_mb():
+    """Highest resident memory this process has reached, in MB (None if unknown)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def session_bytes(upload, texts, messages):
+    """Rough bytes one session keeps alive: the upload, derived texts and chat history"""
+    total = upload.size if upload is not None else 0
+    total += sum(len(text) for text in texts)
+    return total + sum(len(msg["content"]) for msg in messages)